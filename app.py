@@ -846,6 +846,14 @@ def shutdown_event():
         scheduler.shutdown()
         print("[Scheduler] Background scheduler stopped")
 
+@app.on_event("shutdown")
+async def close_http_sessions():
+    """Close pooled HTTP sessions held by services"""
+    from services.stock_market_service import stock_market_service
+    from services.http_clients import close_clients
+    await stock_market_service.close()
+    await close_clients()
+
 
 # ================= MODELS =================
 class WebhookPayload(BaseModel):
@@ -8,6 +8,9 @@ import requests
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
+# Characters stripped from phone numbers before sending (one pass)
+_PHONE_STRIP = str.maketrans("", "", "+ -")
+
 class EvolutionAPIService:
     """
     Evolution API integration for WhatsApp messaging
@@ -98,7 +101,7 @@ class EvolutionAPIService:
             message: Message text to send
         """
         # Clean phone number
-        phone = phone.replace("+", "").replace(" ", "").replace("-", "")
+        phone = phone.translate(_PHONE_STRIP)
         
         try:
             response = requests.post(
@@ -133,7 +136,7 @@ class EvolutionAPIService:
             caption: Optional caption
             media_type: image, video, audio, document
         """
-        phone = phone.replace("+", "").replace(" ", "")
+        phone = phone.translate(_PHONE_STRIP)
         
         try:
             response = requests.post(
@@ -161,7 +164,7 @@ class EvolutionAPIService:
     
     def send_document(self, phone: str, doc_url: str, filename: str) -> dict:
         """Send document (PDF, etc.)"""
-        phone = phone.replace("+", "").replace(" ", "")
+        phone = phone.translate(_PHONE_STRIP)
         
         try:
             response = requests.post(
@@ -220,7 +223,7 @@ class EvolutionAPIService:
     
     def get_profile_picture(self, phone: str) -> Optional[str]:
         """Get profile picture URL of a phone number"""
-        phone = phone.replace("+", "").replace(" ", "")
+        phone = phone.translate(_PHONE_STRIP)
         
         try:
             response = requests.get(
@@ -0,0 +1,55 @@
+"""
+Shared HTTP Clients
+===================
+Pooled httpx clients reused by outbound integrations (webhooks,
+WhatsApp Cloud API) so repeated calls keep their TCP/TLS connections.
+"""
+import asyncio
+import atexit
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+
+# Pool sizing shared by the sync and async clients
+HTTP_TIMEOUT = httpx.Timeout(10.0)
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+
+_sync_client: Optional[httpx.Client] = None
+# One async client per event loop: an AsyncClient's connections belong to
+# the loop that opened them. Entries go away with their loop.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def get_sync_client() -> httpx.Client:
+    """Get the process-wide sync client (thread-safe, created on first use)"""
+    global _sync_client
+    if _sync_client is None:
+        with _lock:
+            if _sync_client is None:
+                _sync_client = httpx.Client(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+                atexit.register(_sync_client.close)
+    return _sync_client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Get the async client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+        _async_clients[loop] = client
+    return client
+
+
+async def close_clients():
+    """Close the shared clients (called on app shutdown)"""
+    global _sync_client
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
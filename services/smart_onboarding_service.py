@@ -4,8 +4,27 @@ Handles complete user onboarding with goals, income, and personalized plans
 """
 
 from typing import Dict, List, Optional, Any
-from datetime import datetime
+import asyncio
+import functools
 import re
+import string
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+
+# Interned language names; stored languages are interned too so the
+# comparisons below resolve on the identity fast path
+_ENGLISH, _HINDI = sys.intern("english"), sys.intern("hindi")
+
+# Numbered language picker embedded in welcome messages
+_LANG_MENU = """1️⃣ English
+2️⃣ हिंदी
+3️⃣ தமிழ்
+4️⃣ తెలుగు
+5️⃣ ಕನ್ನಡ"""
 
 # Language translations for onboarding
 ONBOARDING_MESSAGES = {
@@ -20,66 +39,6 @@ Just type: *English*, *Hindi*, or *Tamil*
 
 (Or type: తెలుగు, ಕನ್ನಡ, മലയാളം, मराठी, বাংলা)""",
         
-        "lang_set": "✅ Language set to *English*! 🎉",
-        
-        "ask_name": """📝 Great!
-
-What's your name?
-
-(Just type your name)""",
-        
-        "ask_profession": """💼 Nice to meet you, {name}!
-
-What do you do for work?
-
-Just tell me! Examples: Student, Teacher, Doctor, IT Employee, Housewife, Driver, Business, Freelancer...""",
-        
-        "ask_income": """💰 Got it!
-
-What's your approximate monthly income?
-
-Just type the amount! Examples: 25000, 50000, 15k...""",
-        
-        "ask_goals": """🎯 Great! What are your financial goals?
-
-Tell me what you want to achieve! Examples:
-• Emergency fund
-• Save for house/home
-• Education
-• Pay off loans
-• Marriage
-• Retirement
-• Start business
-• General savings
-
-Just type like: 'emergency fund and house' or 'education, marriage'""",
-        
-        "ask_savings_target": """📊 Almost done!
-
-How much do you want to save each month?
-
-Your income: ₹{income}
-Suggested (20%): ₹{suggested}
-
-Just type an amount like: 5000, 10000, 10k...""",
-        
-        "complete": """🎉 *Congratulations, {name}!*
-
-Your MoneyViya profile is ready!
-
-📊 *Your Financial Plan:*
-💰 Monthly Income: ₹{income}
-💾 Savings Goal: ₹{savings}/month
-📅 Daily Budget: ₹{daily_budget}
-
-💡 *How to use:*
-• "spent 100 on food" → Track expense
-• "earned 5000" → Track income  
-• "balance" → See your status
-• "help" → All commands
-
-Let's start! 🚀""",
-        
         "returning_user": """👋 *Welcome back, {name}!*
 
 Good to see you again! 😊
@@ -248,11 +207,7 @@ Let's start your financial journey! 🚀""",
 
 மொழி தேர்ந்தெடுக்கவும்:
 
-1️⃣ English
-2️⃣ हिंदी
-3️⃣ தமிழ்
-4️⃣ తెలుగు
-5️⃣ ಕನ್ನಡ
+""" + _LANG_MENU + """
 
 எண் அனுப்புங்கள் (1-5)""",
         
@@ -336,6 +291,41 @@ Let's start your financial journey! 🚀""",
     }
 }
 
+# Flat (language, key) -> template table with English fallbacks resolved,
+# and the parsed form of each template. English is loaded at import; other
+# languages are added the first time a user needs them.
+_MESSAGE_TABLE: Dict[tuple, str] = {}
+_COMPILED_TEMPLATES: Dict[str, tuple] = {}
+_LOADED_LANGUAGES = set()
+
+
+def _compile_template(template: str) -> tuple:
+    """Split a message template into (literal, field name) pairs once"""
+    return tuple(
+        (literal, field)
+        for literal, field, _spec, _conversion in string.Formatter().parse(template)
+    )
+
+
+def _load_language(lang: str) -> bool:
+    """Add a language's templates to the lookup tables; False if unknown"""
+    messages = ONBOARDING_MESSAGES.get(lang)
+    if messages is None:
+        _LOADED_LANGUAGES.add(lang)
+        return False
+    for key, fallback in ONBOARDING_MESSAGES[_ENGLISH].items():
+        template = messages.get(key, fallback)
+        if template not in _COMPILED_TEMPLATES:
+            _COMPILED_TEMPLATES[template] = _compile_template(template)
+        _MESSAGE_TABLE[(lang, key)] = template
+    # Marked loaded only once every template is in the table, so a concurrent
+    # get_message never skips the load and falls back to English
+    _LOADED_LANGUAGES.add(lang)
+    return True
+
+
+_load_language(_ENGLISH)
+
 # Profession mapping
 PROFESSIONS = {
     "1": "Delivery Partner",
@@ -373,6 +363,68 @@ GOALS = {
     "8": {"en": "General Savings", "hi": "सामान्य बचत", "emoji": "💰"}
 }
 
+# Free-text profession keywords -> profession
+_PROFESSION_KEYWORDS = {
+    "student": "Student",
+    "housewife": "Homemaker", 
+    "homemaker": "Homemaker",
+    "teacher": "Salaried Employee",
+    "doctor": "Salaried Employee",
+    "engineer": "Salaried Employee",
+    "it": "Salaried Employee",
+    "software": "Salaried Employee",
+    "employee": "Salaried Employee",
+    "salaried": "Salaried Employee",
+    "driver": "Cab/Auto Driver",
+    "delivery": "Delivery Partner",
+    "zomato": "Delivery Partner",
+    "swiggy": "Delivery Partner",
+    "uber": "Cab/Auto Driver",
+    "ola": "Cab/Auto Driver",
+    "shop": "Shopkeeper",
+    "business": "Shopkeeper",
+    "freelance": "Freelancer",
+    "freelancer": "Freelancer",
+    "self-employed": "Freelancer",
+    "daily wage": "Daily Wage Worker",
+    "labour": "Daily Wage Worker",
+    "worker": "Daily Wage Worker",
+    "other": "Other"
+}
+# Canonical profession names are interned so every stored record shares them
+_PROFESSION_KEYWORDS = {kw: sys.intern(value) for kw, value in _PROFESSION_KEYWORDS.items()}
+_PROFESSION_RANK = {kw: rank for rank, kw in enumerate(_PROFESSION_KEYWORDS)}
+
+# Substring match at every position, alternatives in table order
+_PROFESSION_RE = re.compile(
+    "(?=(" + "|".join(re.escape(kw) for kw in _PROFESSION_KEYWORDS) + "))"
+)
+
+# Goal keywords mapping
+_GOAL_KEYWORDS = {
+    "1": ["1", "emergency", "fund", "backup", "rainy day"],
+    "2": ["2", "house", "home", "property", "flat", "apartment", "down payment"],
+    "3": ["3", "education", "study", "college", "school", "course", "learn"],
+    "4": ["4", "debt", "loan", "emi", "pay off", "credit card"],
+    "5": ["5", "marriage", "wedding", "shaadi", "விவாகம்"],
+    "6": ["6", "retirement", "retire", "pension", "old age"],
+    "7": ["7", "business", "startup", "shop", "venture", "entrepreneur"],
+    "8": ["8", "savings", "save", "general", "money"]
+}
+_GOAL_BY_KEYWORD = {kw: gid for gid, keywords in _GOAL_KEYWORDS.items() for kw in keywords}
+
+# Substring match for any keyword; the lookahead reports overlapping hits
+# so "retirement savings" still yields both goals
+_GOAL_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(re.escape(kw) for kw in sorted(_GOAL_BY_KEYWORD, key=len, reverse=True)) + "))"
+)
+
+# Pre-rendered "<emoji> <name>" goal lines per language key and goal id
+_GOAL_LINES = {
+    lang_key: {gid: f"{goal['emoji']} {goal[lang_key]}" for gid, goal in GOALS.items()}
+    for lang_key in ("en", "hi")
+}
+
 # Language code mapping - accepts both numbers AND text
 LANGUAGE_MAP = {
     # Numbers
@@ -407,102 +459,152 @@ LANGUAGE_MAP = {
 }
 
 
+# Amount suffixes, found anywhere in the reply ("20 to 25k" -> 25000)
+_K_SUFFIX_RE = re.compile(r"(\d+)\s*k\b")
+_LAKH_SUFFIX_RE = re.compile(r"(\d+)\s*(?:lakh|lac)\b")
+# Currency symbols, commas and spaces dropped before reading a plain amount
+_NUMBER_NOISE_RE = re.compile(r"[₹,\s]")
+_DIGITS_RE = re.compile(r"\d+")
+
+# Profession menu order, indexed by the digit replied ("1" -> index 1)
+_PROFESSIONS_TUPLE = ("",) + tuple(sys.intern(PROFESSIONS[str(i)]) for i in range(1, 10))
+
+# Language menu order (reply "1" -> english ... "8" -> bengali)
+_LANG_BY_INDEX = ("english", "hindi", "tamil", "telugu", "kannada", "malayalam", "marathi", "bengali")
+
+
+@functools.lru_cache(maxsize=1)
+def _iso_timestamp(epoch_second: int) -> str:
+    """ISO timestamp for an epoch second, reused for calls within that second"""
+    return datetime.fromtimestamp(epoch_second).isoformat()
+
+
+def _iso_now() -> str:
+    """Current local time in ISO format with microseconds, like datetime.now().isoformat()"""
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    return f"{_iso_timestamp(seconds)}.{nanos // 1000:06d}"
+
+
+@functools.lru_cache(maxsize=512)
+def _commafmt(n: int) -> str:
+    """Thousands-separated amount; most users share a few round incomes"""
+    return f"{n:,}"
+
+
+@dataclass(slots=True)
+class OnboardingResponse:
+    """Reply for one onboarding step"""
+    text: str
+    step: str
+    plan: Optional[dict] = None
+    
+    def as_dict(self) -> dict:
+        """Dict form used by the webhook handlers"""
+        result = {"text": self.text, "step": self.step}
+        if self.plan is not None:
+            result["plan"] = self.plan
+        return result
+
+
 class SmartOnboardingService:
     """Handles multi-step onboarding with personalized plans"""
     
     def __init__(self, user_repo):
         self.user_repo = user_repo
     
-    def get_message(self, key: str, language: str = "english", **kwargs) -> str:
+    @staticmethod
+    def get_message(key: str, language: str = "english", **kwargs) -> str:
         """Get message in specified language with variable substitution"""
-        lang = language if language in ONBOARDING_MESSAGES else "english"
-        messages = ONBOARDING_MESSAGES.get(lang, ONBOARDING_MESSAGES["english"])
-        template = messages.get(key, ONBOARDING_MESSAGES["english"].get(key, ""))
-        
-        try:
-            return template.format(**kwargs)
-        except KeyError:
+        template = _MESSAGE_TABLE.get((language, key))
+        if template is None:
+            if language not in _LOADED_LANGUAGES and _load_language(language):
+                template = _MESSAGE_TABLE.get((language, key))
+            if template is None:
+                template = _MESSAGE_TABLE.get((_ENGLISH, key), "")
+        if not kwargs:
             return template
+        
+        segments = _COMPILED_TEMPLATES.get(template) or _compile_template(template)
+        
+        # Fields without a value keep their {placeholder} so gaps are visible
+        return "".join([
+            literal if field is None
+            else literal + (str(kwargs[field]) if field in kwargs else "{" + field + "}")
+            for literal, field in segments
+        ])
     
-    def parse_number(self, text: str) -> Optional[int]:
-        """Extract number from text - handles 25k, 25000, 25,000 formats"""
-        text = text.lower().strip()
+    @staticmethod
+    def parse_number(text: str) -> Optional[int]:
+        """Extract number from text - handles 25k, 25000, 25,000 formats
+        
+        "25k" -> 25000, "₹25,000" -> 25000, "2 lakh" -> 200000,
+        "5000, 25k" -> 25000, "20 to 25k" -> 25000
+        """
+        text = text.lower()
         
         # Handle "k" suffix (25k = 25000)
-        k_match = re.search(r'(\d+)\s*k\b', text)
+        k_match = _K_SUFFIX_RE.search(text)
         if k_match:
             return int(k_match.group(1)) * 1000
         
         # Handle "lakh" or "lac" (1 lakh = 100000)
-        lakh_match = re.search(r'(\d+)\s*(?:lakh|lac)\b', text)
+        lakh_match = _LAKH_SUFFIX_RE.search(text)
         if lakh_match:
             return int(lakh_match.group(1)) * 100000
         
         # Remove currency symbols, commas, etc.
-        cleaned = re.sub(r'[₹,\s]', '', text)
-        numbers = re.findall(r'\d+', cleaned)
-        if numbers:
-            return int(numbers[0])
-        return None
+        number = _DIGITS_RE.search(_NUMBER_NOISE_RE.sub("", text))
+        return int(number.group()) if number else None
     
-    def parse_goals(self, text: str) -> List[str]:
+    @staticmethod
+    def parse_goals(text: str) -> List[str]:
         """Parse goal selections from user input - accepts TEXT like 'emergency fund, house'"""
         text = text.lower()
-        goals = []
-        
-        # Goal keywords mapping
-        goal_keywords = {
-            "1": ["1", "emergency", "fund", "backup", "rainy day"],
-            "2": ["2", "house", "home", "property", "flat", "apartment", "down payment"],
-            "3": ["3", "education", "study", "college", "school", "course", "learn"],
-            "4": ["4", "debt", "loan", "emi", "pay off", "credit card"],
-            "5": ["5", "marriage", "wedding", "shaadi", "விவாகம்"],
-            "6": ["6", "retirement", "retire", "pension", "old age"],
-            "7": ["7", "business", "startup", "shop", "venture", "entrepreneur"],
-            "8": ["8", "savings", "save", "general", "money"]
-        }
         
-        for goal_id, keywords in goal_keywords.items():
-            if any(kw in text for kw in keywords):
-                goals.append(goal_id)
+        # One scan finds every keyword occurrence; goals keep id order
+        goals = sorted({_GOAL_BY_KEYWORD[m.group(1)] for m in _GOAL_KEYWORD_RE.finditer(text)})
         
-        # If no text match, try numbers
+        # If no text match, try numbers - keeps the order typed
         if not goals:
-            numbers = re.findall(r'[1-8]', text)
-            goals = list(set(numbers))
+            goals = list(dict.fromkeys(c for c in text if "1" <= c <= "8"))
         
         return goals[:5]  # Max 5 goals
     
-    def format_goals_list(self, goal_ids: List[str], language: str = "english") -> str:
+    @staticmethod
+    def format_goals_list(goal_ids: List[str], language: str = "english") -> str:
         """Format goals as a readable list"""
-        lang_key = "hi" if language == "hindi" else "en"
-        lines = []
-        for gid in goal_ids:
-            if gid in GOALS:
-                goal = GOALS[gid]
-                lines.append(f"{goal['emoji']} {goal[lang_key]}")
-        return "\n".join(lines) if lines else "General Savings"
+        goal_lines = _GOAL_LINES["hi" if language == _HINDI else "en"]
+        return "\n".join([goal_lines[gid] for gid in goal_ids if gid in goal_lines]) or "General Savings"
     
-    def calculate_daily_budget(self, income: int, savings_target: int) -> int:
+    @staticmethod
+    def calculate_daily_budget(income: int, savings_target: int) -> int:
         """Calculate daily spending budget"""
-        monthly_spending = income - savings_target
-        return max(100, monthly_spending // 30)
+        daily = (income - savings_target) // 30
+        return daily if daily > 100 else 100
     
-    def create_personalized_plan(self, user: dict) -> dict:
-        """Create a personalized financial plan based on user data"""
+    def create_personalized_plan(self, user: dict, language: Optional[str] = None,
+                                 name: Optional[str] = None) -> dict:
+        """Create a personalized financial plan based on user data.
+        
+        The plan also carries the rendered completion message in
+        ``completion_text`` (in ``language``, addressed to ``name``).
+        """
         income = user.get("monthly_income", 20000)
         goals = user.get("financial_goals", ["8"])
-        savings_target = user.get("savings_target", int(income * 0.2))
+        savings_target = user.get("savings_target", income // 5)
         
         daily_budget = self.calculate_daily_budget(income, savings_target)
-        savings_percent = round((savings_target / income) * 100) if income > 0 else 20
+        # Rounded percentage in integer arithmetic (no float division)
+        savings_percent = (savings_target * 100 + income // 2) // income if income > 0 else 20
         
         # Primary goal is the first one
         primary_goal_id = goals[0] if goals else "8"
-        lang = user.get("preferred_language", "english")
-        lang_key = "hi" if lang == "hindi" else "en"
+        lang = user.get("preferred_language", _ENGLISH)
+        lang_key = "hi" if lang == _HINDI else "en"
         primary_goal = GOALS.get(primary_goal_id, GOALS["8"])[lang_key]
         
+        goals_formatted = self.format_goals_list(goals, lang)
+        
         return {
             "income": income,
             "savings_target": savings_target,
@@ -510,222 +612,244 @@ class SmartOnboardingService:
             "savings_percent": savings_percent,
             "primary_goal": primary_goal,
             "goals": goals,
-            "goals_formatted": self.format_goals_list(goals, lang)
+            "goals_formatted": goals_formatted,
+            "completion_text": self.get_message("complete", language or lang,
+                name=name or user.get("name", "Friend"),
+                income=_commafmt(income),
+                savings=_commafmt(savings_target),
+                percent=savings_percent,
+                daily_budget=_commafmt(daily_budget),
+                primary_goal=primary_goal,
+                goals_list=goals_formatted
+            )
         }
     
-    def process_onboarding(self, phone: str, message: str, user: dict) -> dict:
+    def process_onboarding(self, phone: str, message: str, user: dict) -> OnboardingResponse:
         """Process onboarding message and return response"""
         
         step = user.get("onboarding_step", "language")
-        language = user.get("preferred_language", "english")
+        language = sys.intern(user.get("preferred_language") or _ENGLISH)
         
-        # Step 1: Language selection
-        if step == "language" or step == "language_selection":
-            lang_input = message.strip().lower()
+        handler = self._STEP_HANDLERS.get(step, SmartOnboardingService._handle_restart)
+        return handler(self, phone, message, user, language)
+    
+    async def process_onboarding_async(self, phone: str, message: str, user: dict) -> OnboardingResponse:
+        """Async variant of process_onboarding for use inside request handlers.
+        
+        The repository is synchronous (file-backed), so the step runs in a
+        worker thread to keep its writes off the event loop.
+        """
+        return await asyncio.to_thread(self.process_onboarding, phone, message, user)
+    
+    # Step 1: Language selection
+    def _handle_language(self, phone: str, message: str, user: dict, language: str) -> OnboardingResponse:
+        lang_input = message.strip()
+        # Menu digits are the common reply; only fall back to names otherwise
+        if len(lang_input) == 1 and "1" <= lang_input <= "8":
+            selected_lang = _LANG_BY_INDEX[ord(lang_input) - 49]
+        else:
+            # Native-script names match as typed; only ASCII needs lowering
             selected_lang = LANGUAGE_MAP.get(lang_input)
-            
-            if selected_lang:
-                self.user_repo.update_user(phone, {
-                    "preferred_language": selected_lang,
-                    "language": selected_lang,
-                    "onboarding_step": "name"
-                })
-                return {
-                    "text": self.get_message("lang_set", selected_lang) + "\n\n" + 
-                            self.get_message("ask_name", selected_lang),
-                    "step": "name"
-                }
-            else:
-                return {
-                    "text": self.get_message("invalid_choice", language),
-                    "step": "language"
-                }
-        
-        # Step 2: Name
-        elif step == "name":
-            name = message.strip()
-            if len(name) >= 2 and len(name) <= 50:
-                self.user_repo.update_user(phone, {
-                    "name": name,
-                    "onboarding_step": "profession"
-                })
-                return {
-                    "text": self.get_message("ask_profession", language, name=name),
-                    "step": "profession"
-                }
-            else:
-                return {
-                    "text": self.get_message("ask_name", language),
-                    "step": "name"
-                }
-        
-        # Step 3: Profession - Accept BOTH text and numbers
-        elif step == "profession":
-            prof_input = message.strip().lower()
-            profession = None
-            
-            # First check if it's a number (1-9)
-            if prof_input in PROFESSIONS:
-                profession = PROFESSIONS[prof_input]
-            else:
-                # Accept text input - map common professions
-                profession_keywords = {
-                    "student": "Student",
-                    "housewife": "Homemaker", 
-                    "homemaker": "Homemaker",
-                    "teacher": "Salaried Employee",
-                    "doctor": "Salaried Employee",
-                    "engineer": "Salaried Employee",
-                    "it": "Salaried Employee",
-                    "software": "Salaried Employee",
-                    "employee": "Salaried Employee",
-                    "salaried": "Salaried Employee",
-                    "driver": "Cab/Auto Driver",
-                    "delivery": "Delivery Partner",
-                    "zomato": "Delivery Partner",
-                    "swiggy": "Delivery Partner",
-                    "uber": "Cab/Auto Driver",
-                    "ola": "Cab/Auto Driver",
-                    "shop": "Shopkeeper",
-                    "business": "Shopkeeper",
-                    "freelance": "Freelancer",
-                    "freelancer": "Freelancer",
-                    "self-employed": "Freelancer",
-                    "daily wage": "Daily Wage Worker",
-                    "labour": "Daily Wage Worker",
-                    "worker": "Daily Wage Worker",
-                    "other": "Other"
-                }
-                
-                # Check if any keyword matches
-                for keyword, prof_value in profession_keywords.items():
-                    if keyword in prof_input:
-                        profession = prof_value
-                        break
-                
-                # If still no match, accept any text as custom profession
-                if not profession and len(prof_input) >= 2:
-                    profession = message.strip().title()  # Capitalize properly
-            
-            if profession:
-                self.user_repo.update_user(phone, {
-                    "profession": profession,
-                    "profession_type": profession.lower().replace(" ", "_"),
-                    "onboarding_step": "income"
-                })
-                return {
-                    "text": self.get_message("ask_income", language),
-                    "step": "income"
-                }
-            else:
-                name = user.get("name", "Friend")
-                return {
-                    "text": self.get_message("ask_profession", language, name=name),
-                    "step": "profession"
-                }
-        
-        # Step 4: Monthly Income
-        elif step == "income":
-            msg_lower = message.lower().strip()
-            
-            # Check if user wants to restart or get help
-            if msg_lower in ["hi", "hello", "restart", "start over", "help"]:
-                self.user_repo.update_user(phone, {
-                    "onboarding_step": "language"
-                })
-                return {
-                    "text": self.get_message("welcome", "english"),
-                    "step": "language"
-                }
-            
-            income = self.parse_number(message)
-            # Accept any amount >= 100 (for testing) or >= 500 for real use
-            if income and income >= 100:
-                self.user_repo.update_user(phone, {
-                    "monthly_income": income,
-                    "onboarding_step": "goals"
-                })
-                return {
-                    "text": self.get_message("ask_goals", language),
-                    "step": "goals"
-                }
-            else:
-                return {
-                    "text": self.get_message("invalid_amount", language),
-                    "step": "income"
-                }
-        
-        # Step 5: Financial Goals
-        elif step == "goals":
-            goals = self.parse_goals(message)
-            if goals:
-                self.user_repo.update_user(phone, {
-                    "financial_goals": goals,
-                    "onboarding_step": "savings_target"
-                })
-                income = user.get("monthly_income", 20000)
-                suggested = int(income * 0.2)
-                return {
-                    "text": self.get_message("ask_savings_target", language, 
-                                             income=f"{income:,}", suggested=f"{suggested:,}"),
-                    "step": "savings_target"
-                }
-            else:
-                return {
-                    "text": self.get_message("ask_goals", language),
-                    "step": "goals"
-                }
-        
-        # Step 6: Savings Target - FINAL
-        elif step == "savings_target":
-            savings = self.parse_number(message)
-            income = user.get("monthly_income", 20000)
-            
-            if not savings:
-                savings = int(income * 0.2)  # Default to 20%
-            
-            # Update user with final data
+            if selected_lang is None and lang_input.isascii():
+                selected_lang = LANGUAGE_MAP.get(lang_input.lower())
+        
+        if selected_lang:
+            selected_lang = sys.intern(selected_lang)
             self.user_repo.update_user(phone, {
-                "savings_target": savings,
-                "monthly_budget": income - savings,
-                "daily_budget": (income - savings) // 30,
-                "onboarding_step": "completed",
-                "onboarding_complete": True,
-                "onboarding_date": datetime.now().isoformat()
+                "preferred_language": selected_lang,
+                "language": selected_lang,
+                "onboarding_step": "name"
             })
+            return OnboardingResponse(
+                text=self.get_message("lang_set", selected_lang) + "\n\n" + 
+                     self.get_message("ask_name", selected_lang),
+                step="name"
+            )
+        else:
+            return OnboardingResponse(
+                text=self.get_message("invalid_choice", language),
+                step="language"
+            )
+    
+    # Step 2: Name
+    def _handle_name(self, phone: str, message: str, user: dict, language: str) -> OnboardingResponse:
+        name = message.strip()
+        if 2 <= len(name) <= 50:
+            self.user_repo.update_user(phone, {
+                "name": name,
+                "onboarding_step": "profession"
+            })
+            return OnboardingResponse(
+                text=self.get_message("ask_profession", language, name=name),
+                step="profession"
+            )
+        else:
+            return OnboardingResponse(
+                text=self.get_message("ask_name", language),
+                step="name"
+            )
+    
+    # Step 3: Profession - Accept BOTH text and numbers
+    def _handle_profession(self, phone: str, message: str, user: dict, language: str) -> OnboardingResponse:
+        prof_input = message.strip().lower()
+        profession = None
+        
+        # First check if it's a number (1-9)
+        if len(prof_input) == 1 and "1" <= prof_input <= "9":
+            profession = _PROFESSIONS_TUPLE[ord(prof_input) - 48]
+        else:
+            # Accept text input - earliest keyword in the table wins
+            matches = [m.group(1) for m in _PROFESSION_RE.finditer(prof_input)]
+            if matches:
+                profession = _PROFESSION_KEYWORDS[min(matches, key=_PROFESSION_RANK.__getitem__)]
             
-            # Get updated user for plan
-            updated_user = self.user_repo.get_user(phone)
-            plan = self.create_personalized_plan(updated_user)
-            
-            return {
-                "text": self.get_message("complete", language,
-                    name=updated_user.get("name", "Friend"),
-                    income=f"{plan['income']:,}",
-                    savings=f"{plan['savings_target']:,}",
-                    percent=plan['savings_percent'],
-                    daily_budget=f"{plan['daily_budget']:,}",
-                    primary_goal=plan['primary_goal'],
-                    goals_list=plan['goals_formatted']
-                ),
-                "step": "completed",
-                "plan": plan
-            }
-        
-        # Default - restart
+            # If still no match, accept any text as custom profession
+            if not profession and len(prof_input) >= 2:
+                profession = message.strip().title()  # Capitalize properly
+                if len(profession) <= 32:
+                    profession = sys.intern(profession)
+        
+        if profession:
+            self.user_repo.update_user(phone, {
+                "profession": profession,
+                "profession_type": profession.lower().replace(" ", "_"),
+                "onboarding_step": "income"
+            })
+            return OnboardingResponse(
+                text=self.get_message("ask_income", language),
+                step="income"
+            )
+        else:
+            name = user.get("name", "Friend")
+            return OnboardingResponse(
+                text=self.get_message("ask_profession", language, name=name),
+                step="profession"
+            )
+    
+    # Step 4: Monthly Income
+    def _handle_income(self, phone: str, message: str, user: dict, language: str) -> OnboardingResponse:
+        msg_lower = message.lower().strip()
+        
+        # Check if user wants to restart or get help
+        if msg_lower in ["hi", "hello", "restart", "start over", "help"]:
+            self.user_repo.update_user(phone, {
+                "onboarding_step": "language"
+            })
+            return OnboardingResponse(
+                text=self.get_message("welcome", "english"),
+                step="language"
+            )
+        
+        income = self.parse_number(message)
+        # Accept any amount >= 100 (for testing) or >= 500 for real use
+        if income and income >= 100:
+            self.user_repo.update_user(phone, {
+                "monthly_income": income,
+                "suggested_savings": income // 5,
+                "onboarding_step": "goals"
+            })
+            return OnboardingResponse(
+                text=self.get_message("ask_goals", language),
+                step="goals"
+            )
+        else:
+            return OnboardingResponse(
+                text=self.get_message("invalid_amount", language),
+                step="income"
+            )
+    
+    # Step 5: Financial Goals
+    def _handle_goals(self, phone: str, message: str, user: dict, language: str) -> OnboardingResponse:
+        goals = self.parse_goals(message)
+        if goals:
+            self.user_repo.update_user(phone, {
+                "financial_goals": goals,
+                "onboarding_step": "savings_target"
+            })
+            income = user.get("monthly_income", 20000)
+            suggested = user.get("suggested_savings") or income // 5
+            return OnboardingResponse(
+                text=self.get_message("ask_savings_target", language, 
+                                      income=_commafmt(income), suggested=_commafmt(suggested)),
+                step="savings_target"
+            )
         else:
-            return {
-                "text": self.get_message("welcome", "english"),
-                "step": "language"
-            }
+            return OnboardingResponse(
+                text=self.get_message("ask_goals", language),
+                step="goals"
+            )
+    
+    # Step 6: Savings Target - FINAL
+    def _handle_savings_target(self, phone: str, message: str, user: dict, language: str) -> OnboardingResponse:
+        savings = self.parse_number(message)
+        income = user.get("monthly_income", 20000)
+        
+        if not savings:
+            savings = user.get("suggested_savings") or income // 5  # Default to 20%
+        
+        # Build the plan from what we already hold, then save everything
+        # (including the plan summary) in one write
+        plan = self.create_personalized_plan(
+            {**user, "monthly_income": income, "savings_target": savings},
+            language, user.get("name", "Friend")
+        )
+        
+        # Update user with final data
+        self.user_repo.update_user(phone, {
+            "savings_target": savings,
+            "monthly_budget": income - savings,
+            "daily_budget": (income - savings) // 30,
+            "primary_goal": plan["primary_goal"],
+            "goals_formatted": plan["goals_formatted"],
+            "onboarding_step": "completed",
+            "onboarding_complete": True,
+            "onboarding_date": _iso_now()
+        })
+        
+        return OnboardingResponse(
+            text=plan["completion_text"],
+            step="completed",
+            plan=plan
+        )
+    
+    # Default - restart
+    def _handle_restart(self, phone: str, message: str, user: dict, language: str) -> OnboardingResponse:
+        return OnboardingResponse(
+            text=self.get_message("welcome", "english"),
+            step="language"
+        )
+    
+    # Onboarding step -> handler
+    _STEP_HANDLERS = {
+        "language": _handle_language,
+        "language_selection": _handle_language,
+        "name": _handle_name,
+        "profession": _handle_profession,
+        "income": _handle_income,
+        "goals": _handle_goals,
+        "savings_target": _handle_savings_target,
+    }
 
 
-# Create global instance
-smart_onboarding = None
+# Lookup tables are read-only once the module is loaded
+PROFESSIONS = MappingProxyType(PROFESSIONS)
+PROFESSIONS_HINDI = MappingProxyType(PROFESSIONS_HINDI)
+GOALS = MappingProxyType(GOALS)
+LANGUAGE_MAP = MappingProxyType(LANGUAGE_MAP)
+ONBOARDING_MESSAGES = MappingProxyType({
+    lang: MappingProxyType(messages) for lang, messages in ONBOARDING_MESSAGES.items()
+})
 
-def get_smart_onboarding(user_repo):
-    global smart_onboarding
-    if smart_onboarding is None:
-        smart_onboarding = SmartOnboardingService(user_repo)
-    return smart_onboarding
 
+# One service per repository, kept for the life of the process
+_onboarding_services: Dict[Any, SmartOnboardingService] = {}
+_onboarding_services_lock = threading.Lock()
+
+
+def get_smart_onboarding(user_repo):
+    """Shared SmartOnboardingService per repository"""
+    service = _onboarding_services.get(user_repo)
+    if service is None:
+        with _onboarding_services_lock:
+            service = _onboarding_services.setdefault(user_repo, SmartOnboardingService(user_repo))
+    return service
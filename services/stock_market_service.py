@@ -6,6 +6,10 @@ Provides real-time market data, analysis, and investment recommendations.
 
 import os
 import json
+import asyncio
+import functools
+import random
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
@@ -17,9 +21,34 @@ try:
 except ImportError:
     AIOHTTP_AVAILABLE = False
 
+# Optional numpy for batched random sampling
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 # AlphaVantage API Key
 ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY", "demo")
 
+# NSE trading hours as minute of the trading day (local time)
+MARKET_OPEN_MINUTE = 9 * 60 + 15
+MARKET_CLOSE_MINUTE = 15 * 60 + 30
+# Saturday 00:00 as minutes since Monday 00:00
+WEEKEND_START_MINUTE = 5 * 1440
+
+# (low, high) of every simulated value in get_market_summary, in draw order
+SIMULATED_SUMMARY_BOUNDS = (
+    (-200, 300), (-1.5, 2.0),      # NIFTY 50 offset, change %
+    (-500, 800), (-1.5, 2.0),      # SENSEX offset, change %
+    (-400, 600), (-2.0, 2.5),      # BANK NIFTY offset, change %
+    (0, 50), (10, 40), (1, 3),     # HDFC Bank price offset, change, change %
+    (0, 100), (20, 60), (1, 2.5),  # Reliance
+    (0, 40), (10, 30), (0.5, 2),   # Infosys
+    (0, 30), (10, 25), (1, 2.5),   # Tata Motors (drawn positive, applied as a fall)
+    (0, 100), (50, 100), (1, 2),   # Bajaj Finance
+)
+
 
 @dataclass
 class StockData:
@@ -49,6 +78,65 @@ class MarketSummary:
     recommendation: str
 
 
+# Market update message per language (str.format templates)
+MARKET_MESSAGE_TEMPLATES = {
+    "en": """📈 *Market Update - {timestamp}*
+
+{market_status}
+
+🇮🇳 *Indian Markets:*
+━━━━━━━━━━━━━━━━━━━━━
+📊 NIFTY 50: {nifty50:,.0f} ({nifty50_change})
+📊 SENSEX: {sensex:,.0f} ({sensex_change})
+🏦 Bank Nifty: {bank_nifty:,.0f} ({bank_nifty_change})
+
+📈 *Top Gainers:*
+{gainers_text}
+📉 *Top Losers:*
+{losers_text}
+💡 *Analysis:*
+{analysis}
+
+{recommendation}""",
+    
+    "hi": """📈 *बाज़ार अपडेट - {date}*
+
+🇮🇳 *भारतीय बाज़ार:*
+━━━━━━━━━━━━━━━━━━━━━
+📊 NIFTY 50: {nifty50:,.0f} ({nifty50_change})
+📊 SENSEX: {sensex:,.0f} ({sensex_change})
+
+💡 *विश्लेषण:*
+बाज़ार सकारात्मक है। SIP जारी रखें!""",
+    
+    "ta": """📈 *சந்தை புதுப்பிப்பு - {date}*
+
+🇮🇳 *இந்திய சந்தைகள்:*
+━━━━━━━━━━━━━━━━━━━━━
+📊 NIFTY 50: {nifty50:,.0f} ({nifty50_change})
+📊 SENSEX: {sensex:,.0f} ({sensex_change})
+
+💡 *பகுப்பாய்வு:*
+சந்தை நேர்மறையாக உள்ளது. SIP தொடருங்கள்!"""
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _market_stamps(epoch_second: int) -> tuple:
+    """(timestamp, date) strings for message headers, formatted once per second"""
+    now = datetime.fromtimestamp(epoch_second)
+    return now.strftime('%d %b %Y, %I:%M %p'), now.strftime('%d %b %Y')
+
+
+def fmt_change(change: float) -> str:
+    """Format a percentage change with a direction emoji"""
+    if change > 0:
+        return f"🟢 +{change:.2f}%"
+    elif change < 0:
+        return f"🔴 {change:.2f}%"
+    return f"⚪ {change:.2f}%"
+
+
 class StockMarketService:
     """
     Stock Market Analysis Service
@@ -83,16 +171,35 @@ class StockMarketService:
     ]
     
     def __init__(self):
-        self.cache = {}
-        self.cache_expiry = {}
+        self.cache: Dict[str, tuple] = {}  # key -> (monotonic expiry, value)
         self.cache_duration = 300  # 5 minutes
+        self._session = None  # Shared aiohttp.ClientSession, created on first use
+        self._request_limit = asyncio.Semaphore(5)  # Concurrent API calls (rate limit)
+        self._rng = np.random.default_rng() if NUMPY_AVAILABLE else None
+        if NUMPY_AVAILABLE:
+            self._sample_low, self._sample_high = (np.array(b, dtype=float) for b in zip(*SIMULATED_SUMMARY_BOUNDS))
+    
+    async def _get_session(self) -> "aiohttp.ClientSession":
+        """Get the shared HTTP session so requests reuse pooled connections"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=60)
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session (called on app shutdown)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
         
     async def _fetch_data(self, params: Dict) -> Optional[Dict]:
         """Fetch data from AlphaVantage API"""
         params["apikey"] = ALPHA_VANTAGE_API_KEY
         
         try:
-            async with aiohttp.ClientSession() as session:
+            session = await self._get_session()
+            async with self._request_limit:
                 async with session.get(self.BASE_URL, params=params) as response:
                     if response.status == 200:
                         return await response.json()
@@ -106,9 +213,9 @@ class StockMarketService:
         
         # Check cache
         cache_key = f"quote_{symbol}"
-        if cache_key in self.cache:
-            if datetime.now().timestamp() < self.cache_expiry.get(cache_key, 0):
-                return self.cache[cache_key]
+        entry = self.cache.get(cache_key)
+        if entry and time.monotonic() < entry[0]:
+            return entry[1]
         
         data = await self._fetch_data({
             "function": "GLOBAL_QUOTE",
@@ -130,39 +237,49 @@ class StockMarketService:
             )
             
             # Cache the result
-            self.cache[cache_key] = stock_data
-            self.cache_expiry[cache_key] = datetime.now().timestamp() + self.cache_duration
+            self.cache[cache_key] = (time.monotonic() + self.cache_duration, stock_data)
             
             return stock_data
         
         return None
     
+    async def get_quotes(self, symbols: List[str]) -> List[Optional[StockData]]:
+        """Get quotes for several symbols concurrently (None where a fetch failed)"""
+        results = await asyncio.gather(*(self.get_quote(s) for s in symbols), return_exceptions=True)
+        return [None if isinstance(r, BaseException) else r for r in results]
+    
+    def _sample_simulated_values(self) -> List[float]:
+        """Draw every simulated summary value in one batch"""
+        if self._rng is not None:
+            return self._rng.uniform(self._sample_low, self._sample_high).tolist()
+        return [random.uniform(low, high) for low, high in SIMULATED_SUMMARY_BOUNDS]
+    
     async def get_market_summary(self) -> MarketSummary:
         """Get complete market summary with analysis"""
         
         # For demo purposes, return simulated data
         # In production, fetch real data from AlphaVantage
         
-        import random
+        sample = iter(self._sample_simulated_values())
         
         # Simulate market data
-        nifty = 22400 + random.uniform(-200, 300)
-        nifty_change = random.uniform(-1.5, 2.0)
-        sensex = 74000 + random.uniform(-500, 800)
-        sensex_change = random.uniform(-1.5, 2.0)
-        bank_nifty = 48500 + random.uniform(-400, 600)
-        bank_nifty_change = random.uniform(-2.0, 2.5)
+        nifty = 22400 + next(sample)
+        nifty_change = next(sample)
+        sensex = 74000 + next(sample)
+        sensex_change = next(sample)
+        bank_nifty = 48500 + next(sample)
+        bank_nifty_change = next(sample)
         
         # Simulate top gainers and losers
         top_gainers = [
-            StockData("HDFC Bank", "HDFCBANK", 1650 + random.uniform(0, 50), random.uniform(10, 40), random.uniform(1, 3), 0, 0, 0, ""),
-            StockData("Reliance", "RELIANCE", 2450 + random.uniform(0, 100), random.uniform(20, 60), random.uniform(1, 2.5), 0, 0, 0, ""),
-            StockData("Infosys", "INFY", 1520 + random.uniform(0, 40), random.uniform(10, 30), random.uniform(0.5, 2), 0, 0, 0, "")
+            StockData("HDFC Bank", "HDFCBANK", 1650 + next(sample), next(sample), next(sample), 0, 0, 0, ""),
+            StockData("Reliance", "RELIANCE", 2450 + next(sample), next(sample), next(sample), 0, 0, 0, ""),
+            StockData("Infosys", "INFY", 1520 + next(sample), next(sample), next(sample), 0, 0, 0, "")
         ]
         
         top_losers = [
-            StockData("Tata Motors", "TATAMOTORS", 850 - random.uniform(0, 30), -random.uniform(10, 25), -random.uniform(1, 2.5), 0, 0, 0, ""),
-            StockData("Bajaj Finance", "BAJFINANCE", 6800 - random.uniform(0, 100), -random.uniform(50, 100), -random.uniform(1, 2), 0, 0, 0, "")
+            StockData("Tata Motors", "TATAMOTORS", 850 - next(sample), -next(sample), -next(sample), 0, 0, 0, ""),
+            StockData("Bajaj Finance", "BAJFINANCE", 6800 - next(sample), -next(sample), -next(sample), 0, 0, 0, "")
         ]
         
         # Generate analysis
@@ -198,11 +315,13 @@ Key factors:
         
         # Determine market status based on time
         now = datetime.now()
-        if now.weekday() >= 5:  # Weekend
+        minute_of_week = now.weekday() * 1440 + now.hour * 60 + now.minute
+        minute_of_day = minute_of_week % 1440
+        if minute_of_week >= WEEKEND_START_MINUTE:
             market_status = "🔴 Closed (Weekend)"
-        elif now.hour < 9 or (now.hour == 9 and now.minute < 15):
+        elif minute_of_day < MARKET_OPEN_MINUTE:
             market_status = "🟡 Pre-Market"
-        elif now.hour >= 15 and now.minute >= 30:
+        elif minute_of_day >= MARKET_CLOSE_MINUTE:
             market_status = "🔴 Closed"
         else:
             market_status = "🟢 Open"
@@ -224,67 +343,31 @@ Key factors:
     def format_market_message(self, summary: MarketSummary, lang: str = "en") -> str:
         """Format market summary for WhatsApp message"""
         
-        # Format change with emoji
-        def fmt_change(change: float) -> str:
-            if change > 0:
-                return f"🟢 +{change:.2f}%"
-            elif change < 0:
-                return f"🔴 {change:.2f}%"
-            return f"⚪ {change:.2f}%"
-        
-        # Format top gainers
-        gainers_text = ""
-        for stock in summary.top_gainers[:3]:
-            gainers_text += f"• {stock.name}: {fmt_change(stock.change_percent)}\n"
-        
-        # Format top losers
-        losers_text = ""
-        for stock in summary.top_losers[:3]:
-            losers_text += f"• {stock.name}: {fmt_change(stock.change_percent)}\n"
-        
-        if lang == "en":
-            return f"""📈 *Market Update - {datetime.now().strftime('%d %b %Y, %I:%M %p')}*
-
-{summary.market_status}
-
-🇮🇳 *Indian Markets:*
-━━━━━━━━━━━━━━━━━━━━━
-📊 NIFTY 50: {summary.nifty50:,.0f} ({fmt_change(summary.nifty50_change)})
-📊 SENSEX: {summary.sensex:,.0f} ({fmt_change(summary.sensex_change)})
-🏦 Bank Nifty: {summary.bank_nifty:,.0f} ({fmt_change(summary.bank_nifty_change)})
-
-📈 *Top Gainers:*
-{gainers_text}
-📉 *Top Losers:*
-{losers_text}
-💡 *Analysis:*
-{summary.analysis}
-
-{summary.recommendation}"""
-        
-        elif lang == "hi":
-            return f"""📈 *बाज़ार अपडेट - {datetime.now().strftime('%d %b %Y')}*
-
-🇮🇳 *भारतीय बाज़ार:*
-━━━━━━━━━━━━━━━━━━━━━
-📊 NIFTY 50: {summary.nifty50:,.0f} ({fmt_change(summary.nifty50_change)})
-📊 SENSEX: {summary.sensex:,.0f} ({fmt_change(summary.sensex_change)})
-
-💡 *विश्लेषण:*
-बाज़ार सकारात्मक है। SIP जारी रखें!"""
-        
-        elif lang == "ta":
-            return f"""📈 *சந்தை புதுப்பிப்பு - {datetime.now().strftime('%d %b %Y')}*
-
-🇮🇳 *இந்திய சந்தைகள்:*
-━━━━━━━━━━━━━━━━━━━━━
-📊 NIFTY 50: {summary.nifty50:,.0f} ({fmt_change(summary.nifty50_change)})
-📊 SENSEX: {summary.sensex:,.0f} ({fmt_change(summary.sensex_change)})
-
-💡 *பகுப்பாய்வு:*
-சந்தை நேர்மறையாக உள்ளது. SIP தொடருங்கள்!"""
+        # Format top gainers / losers (one line each, newline-terminated)
+        gainers_text = "".join(
+            [f"• {stock.name}: {fmt_change(stock.change_percent)}\n" for stock in summary.top_gainers[:3]]
+        )
+        losers_text = "".join(
+            [f"• {stock.name}: {fmt_change(stock.change_percent)}\n" for stock in summary.top_losers[:3]]
+        )
         
-        return self.format_market_message(summary, "en")
+        timestamp, date = _market_stamps(int(time.time()))
+        template = MARKET_MESSAGE_TEMPLATES.get(lang, MARKET_MESSAGE_TEMPLATES["en"])
+        return template.format(
+            timestamp=timestamp,
+            date=date,
+            market_status=summary.market_status,
+            nifty50=summary.nifty50,
+            nifty50_change=fmt_change(summary.nifty50_change),
+            sensex=summary.sensex,
+            sensex_change=fmt_change(summary.sensex_change),
+            bank_nifty=summary.bank_nifty,
+            bank_nifty_change=fmt_change(summary.bank_nifty_change),
+            gainers_text=gainers_text,
+            losers_text=losers_text,
+            analysis=summary.analysis,
+            recommendation=summary.recommendation
+        )
     
     async def get_investment_tips(self, risk_profile: str, monthly_amount: float) -> str:
         """Generate investment tips based on risk profile"""
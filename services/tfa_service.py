@@ -6,11 +6,18 @@ TOTP-based 2FA for sensitive operations
 from datetime import datetime, timedelta
 from typing import Dict, Optional
 from pathlib import Path
+import os
 import json
+import time
+import heapq
 import secrets
+import threading
+import atexit
 import hashlib
+import hmac
 import base64
 import sys
+import unicodedata
 
 sys.path.append(str(Path(__file__).parent.parent))
 
@@ -24,6 +31,24 @@ try:
 except ImportError:
     PYOTP_AVAILABLE = False
 
+# Try to import fast JSON library
+try:
+    import orjson
+    
+    def _json_loads(data: bytes):
+        return orjson.loads(data)
+    
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=list)  # backup code sets -> lists
+    ORJSON_AVAILABLE = True
+except ImportError:
+    def _json_loads(data: bytes):
+        return json.loads(data)
+    
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, default=list).encode()
+    ORJSON_AVAILABLE = False
+
 # Try to import QR code library
 try:
     import qrcode
@@ -36,6 +61,9 @@ except ImportError:
 TFA_DIR = DATA_DIR / "2fa"
 TFA_DIR.mkdir(exist_ok=True)
 
+# Seconds to coalesce session/OTP changes before rewriting their files
+SESSIONS_FLUSH_DELAY = 1.0
+
 
 class TwoFactorAuthService:
     """Two-Factor Authentication using TOTP"""
@@ -43,33 +71,98 @@ class TwoFactorAuthService:
     def __init__(self):
         self.secrets_file = TFA_DIR / "secrets.json"
         self.sessions_file = TFA_DIR / "sessions.json"
+        self.action_otps_file = TFA_DIR / "action_otps.json"
+        self._flush_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._totp_cache: Dict[str, "pyotp.TOTP"] = {}
         self._load_data()
+        atexit.register(self.flush_sessions)
     
     def _load_data(self):
         """Load 2FA data"""
         if self.secrets_file.exists():
-            with open(self.secrets_file, 'r') as f:
-                self.secrets = json.load(f)
+            self.secrets = _json_loads(self.secrets_file.read_bytes())
+            # Backup codes are held as sets in memory (O(1) lookup/removal)
+            for secret_data in self.secrets.values():
+                secret_data["backup_codes"] = set(secret_data.get("backup_codes", []))
         else:
             self.secrets = {}
             self._save_secrets()
         
+        self.sessions = {}
+        self.action_otps = {}
         if self.sessions_file.exists():
-            with open(self.sessions_file, 'r') as f:
-                self.sessions = json.load(f)
-        else:
-            self.sessions = {}
+            self.sessions = _json_loads(self.sessions_file.read_bytes())
+        if self.action_otps_file.exists():
+            self.action_otps = _json_loads(self.action_otps_file.read_bytes())
+        
+        # Older sessions files kept action OTPs under an "action_otps" key
+        legacy_otps = self.sessions.pop("action_otps", None)
+        if legacy_otps:
+            self.action_otps = {**legacy_otps, **self.action_otps}
+        
+        # Older files stored ISO expiry strings; keep epoch floats in memory
+        for entry in [*self.sessions.values(), *self.action_otps.values()]:
+            expires_at = entry.get("expires_at")
+            if isinstance(expires_at, str):
+                entry["expires_at_iso"] = expires_at
+                entry["expires_at"] = datetime.fromisoformat(expires_at).timestamp()
+        
+        # Min-heaps of (expires_at, key) so the sweep only touches expired entries
+        self._session_heap = [(s["expires_at"], sid) for sid, s in self.sessions.items()]
+        self._otp_heap = [(o["expires_at"], key) for key, o in self.action_otps.items()]
+        heapq.heapify(self._session_heap)
+        heapq.heapify(self._otp_heap)
+        
+        if legacy_otps is not None or not self.sessions_file.exists():
             self._save_sessions()
     
     def _save_secrets(self):
         """Save 2FA secrets"""
-        with open(self.secrets_file, 'w') as f:
-            json.dump(self.secrets, f)
+        self.secrets_file.write_bytes(_json_dumps(self.secrets))
     
     def _save_sessions(self):
-        """Save 2FA sessions"""
-        with open(self.sessions_file, 'w') as f:
-            json.dump(self.sessions, f)
+        """Schedule a sessions write; changes within the delay share one write"""
+        with self._flush_lock:
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(SESSIONS_FLUSH_DELAY, self.flush_sessions)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+    
+    def flush_sessions(self):
+        """Write 2FA sessions and action OTPs to disk now"""
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            try:
+                sessions_payload = _json_dumps(self.sessions)
+                otps_payload = _json_dumps(self.action_otps)
+            except RuntimeError:
+                # Changed mid-encode on another thread; that change
+                # schedules its own write, so retry on the next flush
+                return
+            self.sessions_file.write_bytes(sessions_payload)
+            self.action_otps_file.write_bytes(otps_payload)
+    
+    def _totp(self, user_id: str) -> "pyotp.TOTP":
+        """Get the user's TOTP, building it once per secret"""
+        totp = self._totp_cache.get(user_id)
+        if totp is None:
+            totp = pyotp.TOTP(self.secrets[user_id]["secret"])
+            self._totp_cache[user_id] = totp
+        return totp
+    
+    def _verify_totp(self, user_id: str, code: str) -> bool:
+        """Check code against the current 30s step and one step either side"""
+        totp = self._totp(user_id)
+        now = time.time()
+        # NFKC like pyotp's strings_equal: full-width digits from mobile IMEs still match
+        code_bytes = unicodedata.normalize("NFKC", str(code)).encode()
+        for drift in (0, -1, 1):
+            if hmac.compare_digest(totp.at(now, drift).encode(), code_bytes):
+                return True
+        return False
     
     def is_available(self) -> bool:
         """Check if 2FA is available"""
@@ -88,19 +181,21 @@ class TwoFactorAuthService:
         secret = pyotp.random_base32()
         
         # Store secret (not enabled yet)
+        backup_codes = self._generate_backup_codes()
         self.secrets[user_id] = {
             "secret": secret,
             "enabled": False,
             "created_at": datetime.now().isoformat(),
-            "backup_codes": self._generate_backup_codes()
+            "backup_codes": set(backup_codes)
         }
         self._save_secrets()
+        self._totp_cache.pop(user_id, None)
         
         # Generate provisioning URI
         user = user_repo.get_user(user_id)
         user_name = user.get("name", user_id) if user else user_id
         
-        totp = pyotp.TOTP(secret)
+        totp = self._totp(user_id)
         provisioning_uri = totp.provisioning_uri(
             name=user_name,
             issuer_name="MoneyViya"
@@ -110,7 +205,7 @@ class TwoFactorAuthService:
             "success": True,
             "secret": secret,
             "provisioning_uri": provisioning_uri,
-            "backup_codes": self.secrets[user_id]["backup_codes"],
+            "backup_codes": backup_codes,
             "message": "Scan QR code or enter secret in authenticator app"
         }
         
@@ -123,23 +218,22 @@ class TwoFactorAuthService:
             img = qr.make_image(fill_color="black", back_color="white")
             buffer = BytesIO()
             img.save(buffer, format='PNG')
+            png_bytes = buffer.getvalue()
             
+            # Encode the PNG once; the file and base64 share the bytes
             qr_path = TFA_DIR / f"qr_{user_id}.png"
-            img.save(qr_path)
+            qr_path.write_bytes(png_bytes)
             
             result["qr_code_path"] = str(qr_path)
-            result["qr_code_base64"] = base64.b64encode(buffer.getvalue()).decode()
+            result["qr_code_base64"] = base64.b64encode(png_bytes).decode()
         
         return result
     
     def _generate_backup_codes(self, count: int = 8) -> list:
         """Generate backup codes"""
-        codes = []
-        for _ in range(count):
-            code = secrets.token_hex(4).upper()
-            code = f"{code[:4]}-{code[4:]}"
-            codes.append(code)
-        return codes
+        # One CSPRNG read for all codes: 4 random bytes (8 hex chars) per code
+        raw = os.urandom(4 * count).hex().upper()
+        return [f"{raw[i:i + 4]}-{raw[i + 4:i + 8]}" for i in range(0, 8 * count, 8)]
     
     def verify_and_enable(self, user_id: str, code: str) -> Dict:
         """Verify code and enable 2FA"""
@@ -149,10 +243,7 @@ class TwoFactorAuthService:
         if user_id not in self.secrets:
             return {"success": False, "error": "No 2FA setup found. Generate secret first."}
         
-        secret = self.secrets[user_id]["secret"]
-        totp = pyotp.TOTP(secret)
-        
-        if totp.verify(code, valid_window=1):
+        if self._verify_totp(user_id, code):
             self.secrets[user_id]["enabled"] = True
             self.secrets[user_id]["enabled_at"] = datetime.now().isoformat()
             self._save_secrets()
@@ -160,7 +251,7 @@ class TwoFactorAuthService:
             return {
                 "success": True,
                 "message": "2FA enabled successfully",
-                "backup_codes": self.secrets[user_id]["backup_codes"]
+                "backup_codes": sorted(self.secrets[user_id]["backup_codes"])
             }
         else:
             return {"success": False, "error": "Invalid code"}
@@ -174,17 +265,15 @@ class TwoFactorAuthService:
             return {"success": False, "error": "pyotp not installed"}
         
         # Check if it's a backup code
-        if code in self.secrets[user_id].get("backup_codes", []):
-            self.secrets[user_id]["backup_codes"].remove(code)
+        backup_codes = self.secrets[user_id].get("backup_codes")
+        if backup_codes and code in backup_codes:
+            backup_codes.discard(code)
             self.secrets[user_id]["last_backup_code_used"] = datetime.now().isoformat()
             self._save_secrets()
             return {"success": True, "message": "Verified with backup code", "backup_code_used": True}
         
         # Verify TOTP
-        secret = self.secrets[user_id]["secret"]
-        totp = pyotp.TOTP(secret)
-        
-        if totp.verify(code, valid_window=1):
+        if self._verify_totp(user_id, code):
             return {"success": True, "message": "Code verified"}
         else:
             return {"success": False, "error": "Invalid code"}
@@ -192,19 +281,23 @@ class TwoFactorAuthService:
     def create_session(self, user_id: str, duration_minutes: int = 30) -> Dict:
         """Create authenticated session after 2FA verification"""
         session_id = secrets.token_urlsafe(32)
-        expires_at = datetime.now() + timedelta(minutes=duration_minutes)
+        now = datetime.now()
+        expires_at = now + timedelta(minutes=duration_minutes)
+        expires_at_iso = expires_at.isoformat()
         
         self.sessions[session_id] = {
             "user_id": user_id,
-            "created_at": datetime.now().isoformat(),
-            "expires_at": expires_at.isoformat(),
+            "created_at": now.isoformat(),
+            "expires_at": expires_at.timestamp(),
+            "expires_at_iso": expires_at_iso,
             "verified": True
         }
+        heapq.heappush(self._session_heap, (expires_at.timestamp(), session_id))
         self._save_sessions()
         
         return {
             "session_id": session_id,
-            "expires_at": expires_at.isoformat(),
+            "expires_at": expires_at_iso,
             "duration_minutes": duration_minutes
         }
     
@@ -214,9 +307,8 @@ class TwoFactorAuthService:
             return {"valid": False, "error": "Session not found"}
         
         session = self.sessions[session_id]
-        expires_at = datetime.fromisoformat(session["expires_at"])
         
-        if datetime.now() > expires_at:
+        if time.time() > session["expires_at"]:
             del self.sessions[session_id]
             self._save_sessions()
             return {"valid": False, "error": "Session expired"}
@@ -224,7 +316,7 @@ class TwoFactorAuthService:
         return {
             "valid": True,
             "user_id": session["user_id"],
-            "expires_at": session["expires_at"]
+            "expires_at": session["expires_at_iso"]
         }
     
     def invalidate_session(self, session_id: str) -> Dict:
@@ -244,6 +336,7 @@ class TwoFactorAuthService:
         
         if user_id in self.secrets:
             del self.secrets[user_id]
+            self._totp_cache.pop(user_id, None)
             self._save_secrets()
             
             # Delete QR code if exists
@@ -264,7 +357,7 @@ class TwoFactorAuthService:
             return {"success": False, "error": "2FA not enabled"}
         
         new_codes = self._generate_backup_codes()
-        self.secrets[user_id]["backup_codes"] = new_codes
+        self.secrets[user_id]["backup_codes"] = set(new_codes)
         self.secrets[user_id]["backup_codes_regenerated"] = datetime.now().isoformat()
         self._save_secrets()
         
@@ -298,41 +391,37 @@ class TwoFactorAuthService:
         
         # Store OTP
         otp_key = f"{user_id}_{action}"
-        if "action_otps" not in self.sessions:
-            self.sessions["action_otps"] = {}
-        
-        self.sessions["action_otps"][otp_key] = {
+        now = datetime.now()
+        expires_at = now + timedelta(minutes=validity_minutes)
+        self.action_otps[otp_key] = {
             "code": otp_str,
             "action": action,
-            "created_at": datetime.now().isoformat(),
-            "expires_at": (datetime.now() + timedelta(minutes=validity_minutes)).isoformat(),
+            "created_at": now.isoformat(),
+            "expires_at": expires_at.timestamp(),
+            "expires_at_iso": expires_at.isoformat(),
             "used": False
         }
+        heapq.heappush(self._otp_heap, (expires_at.timestamp(), otp_key))
         self._save_sessions()
         
         return {
             "code": otp_str,
             "action": action,
             "validity_minutes": validity_minutes,
-            "expires_at": self.sessions["action_otps"][otp_key]["expires_at"]
+            "expires_at": self.action_otps[otp_key]["expires_at_iso"]
         }
     
     def verify_action_otp(self, user_id: str, action: str, code: str) -> Dict:
         """Verify OTP for specific action"""
         otp_key = f"{user_id}_{action}"
         
-        if "action_otps" not in self.sessions:
-            return {"valid": False, "error": "No OTP found"}
-        
-        if otp_key not in self.sessions["action_otps"]:
+        otp_data = self.action_otps.get(otp_key)
+        if otp_data is None:
             return {"valid": False, "error": "No OTP found for this action"}
         
-        otp_data = self.sessions["action_otps"][otp_key]
-        
         # Check expiry
-        expires_at = datetime.fromisoformat(otp_data["expires_at"])
-        if datetime.now() > expires_at:
-            del self.sessions["action_otps"][otp_key]
+        if time.time() > otp_data["expires_at"]:
+            del self.action_otps[otp_key]
             self._save_sessions()
             return {"valid": False, "error": "OTP expired"}
         
@@ -341,7 +430,7 @@ class TwoFactorAuthService:
             return {"valid": False, "error": "OTP already used"}
         
         # Verify code
-        if otp_data["code"] == code:
+        if hmac.compare_digest(otp_data["code"].encode(), code.encode()):
             otp_data["used"] = True
             otp_data["used_at"] = datetime.now().isoformat()
             self._save_sessions()
@@ -351,31 +440,28 @@ class TwoFactorAuthService:
     
     def cleanup_expired_sessions(self) -> Dict:
         """Remove expired sessions"""
-        now = datetime.now()
+        now = time.time()
         expired = []
         
-        for session_id, session in list(self.sessions.items()):
-            if session_id == "action_otps":
-                continue
-            try:
-                expires_at = datetime.fromisoformat(session["expires_at"])
-                if now > expires_at:
-                    expired.append(session_id)
-                    del self.sessions[session_id]
-            except:
-                pass
-        
-        # Clean expired action OTPs
-        if "action_otps" in self.sessions:
-            for otp_key, otp_data in list(self.sessions["action_otps"].items()):
-                try:
-                    expires_at = datetime.fromisoformat(otp_data["expires_at"])
-                    if now > expires_at:
-                        del self.sessions["action_otps"][otp_key]
-                except:
-                    pass
-        
-        self._save_sessions()
+        # Heap entries can be stale (session already invalidated)
+        heap = self._session_heap
+        while heap and heap[0][0] < now:
+            _, session_id = heapq.heappop(heap)
+            if self.sessions.pop(session_id, None) is not None:
+                expired.append(session_id)
+        
+        # Clean expired action OTPs; a key may have been re-issued with a later expiry
+        otps_cleaned = 0
+        heap = self._otp_heap
+        while heap and heap[0][0] < now:
+            _, otp_key = heapq.heappop(heap)
+            otp_data = self.action_otps.get(otp_key)
+            if otp_data is not None and otp_data["expires_at"] < now:
+                del self.action_otps[otp_key]
+                otps_cleaned += 1
+        
+        if expired or otps_cleaned:
+            self._save_sessions()
         
         return {"cleaned": len(expired)}
 
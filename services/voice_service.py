@@ -2,17 +2,56 @@
 Voice Service - Text-to-Speech and Voice Message Handling
 """
 from pathlib import Path
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List
+import importlib
+import importlib.util
+import hashlib
+import os
+import re
 import sys
+import uuid
 
 sys.path.append(str(Path(__file__).parent.parent))
 from config import VOICES_DIR
 
-try:
-    from gtts import gTTS
-    TTS_AVAILABLE = True
-except ImportError:
-    TTS_AVAILABLE = False
+# gTTS is imported on first synthesis; only check that it is installed here
+TTS_AVAILABLE = importlib.util.find_spec("gtts") is not None
+
+# Sentence boundaries for chunked synthesis (includes the Devanagari danda),
+# not splitting after common abbreviations like "Rs. 500"
+_ABBREVIATIONS = ("Rs", "Mr", "Mrs", "Ms", "Dr", "No", "vs")
+_SENTENCE_END = re.compile(
+    "".join(rf"(?<!\b{abbr}\.)" for abbr in _ABBREVIATIONS) + r"(?<=[.!?।])\s+"
+)
+MIN_CHUNK_CHARS = 10
+
+# App language -> gTTS language
+TTS_LANGUAGES = {"en": "en", "hi": "hi", "ta": "ta", "te": "te", "kn": "kn", "ml": "ml"}
+
+# Morning greeting ({name})
+GREETING_TEMPLATES = {
+    "en": "Good morning {name}! Time to track your income and expenses.",
+    "hi": "सुप्रभात {name}! आज की कमाई और खर्च बताइए।",
+    "ta": "காலை வணக்கம் {name}! இன்றைய வருமானம் மற்றும் செலவுகளை பதிவு செய்யுங்கள்.",
+    "te": "శుభోదయం {name}! ఈరోజు ఆదాయం మరియు ఖర్చులు నమోదు చేయండి.",
+}
+
+# Fraud alert ({amount})
+FRAUD_ALERT_TEMPLATES = {
+    "en": "Warning! A suspicious transaction of {amount} rupees was detected. Please check your WhatsApp immediately and reply YES or NO.",
+    "hi": "चेतावनी! {amount} रुपये का संदिग्ध लेनदेन पाया गया। कृपया तुरंत WhatsApp देखें और YES या NO भेजें।",
+    "ta": "எச்சரிக்கை! {amount} ரூபாய் சந்தேகமான பரிவர்த்தனை கண்டறியப்பட்டது. உடனே WhatsApp பாருங்கள்.",
+    "te": "హెచ్చరిక! {amount} రూపాయల అనుమానాస్పద లావాదేవీ కనుగొనబడింది. దయచేసి WhatsApp తనిఖీ చేయండి.",
+}
+
+# Daily summary ({income}, {expense}, {net})
+SUMMARY_TEMPLATES = {
+    "en": "Today you earned {income} rupees and spent {expense} rupees. Your net savings is {net} rupees.",
+    "hi": "आज आपने {income} रुपये कमाए और {expense} रुपये खर्च किए। आपकी नेट बचत {net} रुपये है।",
+    "ta": "இன்று நீங்கள் {income} ரூபாய் சம்பாதித்தீர்கள், {expense} ரூபாய் செலவழித்தீர்கள். உங்கள் சேமிப்பு {net} ரூபாய்.",
+    "te": "ఈరోజు మీరు {income} రూపాయలు సంపాదించారు, {expense} రూపాయలు ఖర్చు చేశారు. మీ పొదుపు {net} రూపాయలు.",
+}
 
 
 class VoiceService:
@@ -20,61 +59,92 @@ class VoiceService:
     
     def __init__(self):
         VOICES_DIR.mkdir(exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tts")
+        self._gTTS = None
     
     def generate_voice(self, text: str, language: str = "en", filename: str = None) -> str:
         """Generate voice message from text"""
         if not TTS_AVAILABLE:
             return None
         
-        lang_map = {"en": "en", "hi": "hi", "ta": "ta", "te": "te", "kn": "kn", "ml": "ml"}
-        tts_lang = lang_map.get(language, "en")
+        tts_lang = TTS_LANGUAGES.get(language, "en")
         
         if not filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"voice_{timestamp}.mp3"
-        
-        file_path = VOICES_DIR / filename
+            # Same text + language -> same file, so repeats skip synthesis
+            key = hashlib.blake2b(f"{tts_lang}|{text}".encode(), digest_size=16).hexdigest()
+            file_path = VOICES_DIR / f"tts_{key}.mp3"
+            if file_path.exists():
+                return str(file_path)
+        else:
+            file_path = VOICES_DIR / filename
         
         try:
-            tts = gTTS(text=text, lang=tts_lang)
-            tts.save(str(file_path))
+            if self._gTTS is None:
+                self._gTTS = importlib.import_module("gtts").gTTS
+            tts = self._gTTS(text=text, lang=tts_lang)
+            # Write to a unique temp file then rename, so a cached path never
+            # points at a partial file and concurrent syntheses don't collide
+            tmp_path = file_path.with_name(f"{file_path.name}.{uuid.uuid4().hex}.tmp")
+            try:
+                tts.save(str(tmp_path))
+                os.replace(tmp_path, file_path)
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
             return str(file_path)
         except Exception as e:
             print(f"TTS Error: {e}")
             return None
     
+    @staticmethod
+    def _split_sentences(text: str) -> List[str]:
+        """Split text into sentences, folding very short pieces (e.g. "Rs.") into the next"""
+        chunks = []
+        pending = ""
+        for sentence in _SENTENCE_END.split(text.strip()):
+            pending = f"{pending} {sentence}" if pending else sentence
+            if len(pending) >= MIN_CHUNK_CHARS:
+                chunks.append(pending)
+                pending = ""
+        if pending:
+            if chunks:
+                chunks[-1] = f"{chunks[-1]} {pending}"
+            else:
+                chunks.append(pending)
+        return chunks
+    
+    def generate_voice_stream(self, text: str, language: str = "en") -> Iterator[str]:
+        """Synthesize text sentence by sentence in parallel, yielding file paths in order
+        
+        The first path is available after one sentence is synthesized instead of
+        the whole text, so long summaries can start playing sooner.
+        """
+        if not TTS_AVAILABLE:
+            return
+        
+        futures = [
+            self._executor.submit(self.generate_voice, chunk, language)
+            for chunk in self._split_sentences(text)
+        ]
+        for future in futures:
+            path = future.result()
+            if path:
+                yield path
+    
     def generate_greeting(self, name: str, language: str = "en") -> str:
         """Generate morning greeting voice"""
-        greetings = {
-            "en": f"Good morning {name}! Time to track your income and expenses.",
-            "hi": f"सुप्रभात {name}! आज की कमाई और खर्च बताइए।",
-            "ta": f"காலை வணக்கம் {name}! இன்றைய வருமானம் மற்றும் செலவுகளை பதிவு செய்யுங்கள்.",
-            "te": f"శుభోదయం {name}! ఈరోజు ఆదాయం మరియు ఖర్చులు నమోదు చేయండి.",
-        }
-        text = greetings.get(language, greetings["en"])
-        return self.generate_voice(text, language, f"greeting_{name.lower()}.mp3")
+        text = GREETING_TEMPLATES.get(language, GREETING_TEMPLATES["en"]).format(name=name)
+        return self.generate_voice(text, language)
     
     def generate_fraud_alert_voice(self, amount: int, language: str = "en") -> str:
         """Generate fraud alert voice message"""
-        alerts = {
-            "en": f"Warning! A suspicious transaction of {amount} rupees was detected. Please check your WhatsApp immediately and reply YES or NO.",
-            "hi": f"चेतावनी! {amount} रुपये का संदिग्ध लेनदेन पाया गया। कृपया तुरंत WhatsApp देखें और YES या NO भेजें।",
-            "ta": f"எச்சரிக்கை! {amount} ரூபாய் சந்தேகமான பரிவர்த்தனை கண்டறியப்பட்டது. உடனே WhatsApp பாருங்கள்.",
-            "te": f"హెచ్చరిక! {amount} రూపాయల అనుమానాస్పద లావాదేవీ కనుగొనబడింది. దయచేసి WhatsApp తనిఖీ చేయండి.",
-        }
-        text = alerts.get(language, alerts["en"])
-        return self.generate_voice(text, language, f"fraud_alert_{amount}.mp3")
+        text = FRAUD_ALERT_TEMPLATES.get(language, FRAUD_ALERT_TEMPLATES["en"]).format(amount=amount)
+        return self.generate_voice(text, language)
     
     def generate_summary_voice(self, income: int, expense: int, language: str = "en") -> str:
         """Generate daily summary voice"""
-        net = income - expense
-        summaries = {
-            "en": f"Today you earned {income} rupees and spent {expense} rupees. Your net savings is {net} rupees.",
-            "hi": f"आज आपने {income} रुपये कमाए और {expense} रुपये खर्च किए। आपकी नेट बचत {net} रुपये है।",
-            "ta": f"இன்று நீங்கள் {income} ரூபாய் சம்பாதித்தீர்கள், {expense} ரூபாய் செலவழித்தீர்கள். உங்கள் சேமிப்பு {net} ரூபாய்.",
-            "te": f"ఈరోజు మీరు {income} రూపాయలు సంపాదించారు, {expense} రూపాయలు ఖర్చు చేశారు. మీ పొదుపు {net} రూపాయలు.",
-        }
-        text = summaries.get(language, summaries["en"])
+        template = SUMMARY_TEMPLATES.get(language, SUMMARY_TEMPLATES["en"])
+        text = template.format(income=income, expense=expense, net=income - expense)
         return self.generate_voice(text, language)
 
 
@@ -6,11 +6,20 @@ Send real-time notifications to external services
 from datetime import datetime
 from typing import Dict, List, Optional
 from pathlib import Path
+from collections import deque
+import os
 import json
 import hmac
 import hashlib
 import asyncio
+import itertools
+import random
+import time
+import queue
+import threading
+import atexit
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append(str(Path(__file__).parent.parent))
 
@@ -18,15 +27,48 @@ from config import DATA_DIR
 
 # Try async HTTP client
 try:
-    import httpx
+    from services.http_clients import get_sync_client, get_async_client
     HTTPX_AVAILABLE = True
 except ImportError:
     import requests
     HTTPX_AVAILABLE = False
 
+# Fast JSON encoding when orjson is installed
+try:
+    import orjson
+    
+    def _json_bytes(obj, indent: bool = False) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option)
+    ORJSON_AVAILABLE = True
+except ImportError:
+    def _json_bytes(obj, indent: bool = False) -> bytes:
+        return json.dumps(obj, indent=2 if indent else None).encode()
+    ORJSON_AVAILABLE = False
+
 WEBHOOKS_DIR = DATA_DIR / "webhooks"
 WEBHOOKS_DIR.mkdir(exist_ok=True)
 
+# Max webhook deliveries in flight at once for a single trigger
+WEBHOOK_MAX_CONCURRENCY = 20
+
+# Delivery attempts per webhook; 5xx, 429 and network errors are retried
+# after WEBHOOK_RETRY_BASE_DELAY * 2**attempt seconds plus a little jitter
+WEBHOOK_MAX_ATTEMPTS = 3
+WEBHOOK_RETRY_BASE_DELAY = 0.25
+
+# Events delivered ahead of everything else waiting in the background queue
+PRIORITY_EVENTS = frozenset({"fraud.detected", "fraud.confirmed", "login.failed"})
+
+# Delivery log: append-only JSON lines, flushed in batches and rotated by size
+LOG_FLUSH_DELAY = 2.0
+LOG_MAX_BYTES = 1_000_000
+LOG_KEEP = 1000  # entries kept in memory for get_logs()
+
+# Delivery counters live apart from the registration config and are snapshotted periodically
+STATS_FIELDS = ("last_triggered", "success_count", "failure_count")
+STATS_SNAPSHOT_DELAY = 30.0
+
 
 class WebhookService:
     """Manage and trigger webhooks for external integrations"""
@@ -59,8 +101,24 @@ class WebhookService:
     
     def __init__(self):
         self.config_file = WEBHOOKS_DIR / "webhooks.json"
-        self.log_file = WEBHOOKS_DIR / "webhook_logs.json"
+        self.log_file = WEBHOOKS_DIR / "webhook_logs.jsonl"
+        self.stats_file = WEBHOOKS_DIR / "webhook_stats.json"
+        self._stats_lock = threading.Lock()  # guards self.stats and the snapshot timer
+        self._stats_write_lock = threading.Lock()  # one snapshot written at a time
+        self._stats_timer: Optional[threading.Timer] = None
+        self._log_buffer: List[Dict] = []
+        self._log_lock = threading.Lock()
+        self._log_timer: Optional[threading.Timer] = None
+        self._send_limit = asyncio.Semaphore(WEBHOOK_MAX_CONCURRENCY)
+        self._executor = ThreadPoolExecutor(max_workers=WEBHOOK_MAX_CONCURRENCY, thread_name_prefix="webhook")
+        self._queue = queue.PriorityQueue()
+        self._queue_seq = itertools.count()  # FIFO order within a priority
+        self._dispatcher: Optional[threading.Thread] = None
+        self._dispatcher_lock = threading.Lock()
+        self._signers: Dict[str, "hmac.HMAC"] = {}  # secret -> keyed HMAC to copy per payload
         self._load_config()
+        atexit.register(self.flush_logs)
+        atexit.register(self.flush_stats)
     
     def _load_config(self):
         """Load webhook configuration"""
@@ -71,23 +129,109 @@ class WebhookService:
             self.webhooks = {}
             self._save_config()
         
+        self.stats = {}
+        if self.stats_file.exists():
+            with open(self.stats_file, 'r') as f:
+                self.stats = json.load(f)
+        
+        # Older configs kept the counters on each webhook; move them out
+        migrated = False
+        for webhook_id, webhook in self.webhooks.items():
+            legacy = {key: webhook.pop(key) for key in STATS_FIELDS if key in webhook}
+            migrated = migrated or bool(legacy)
+            self.stats.setdefault(webhook_id, {**self._new_stats(), **legacy})
+        if migrated:
+            self._save_config()
+            self.flush_stats()
+        self._reindex()
+        
+        self.logs = deque(maxlen=LOG_KEEP)
+        legacy_log_file = WEBHOOKS_DIR / "webhook_logs.json"
         if self.log_file.exists():
             with open(self.log_file, 'r') as f:
-                self.logs = json.load(f)
-        else:
-            self.logs = []
+                self.logs.extend(json.loads(line) for line in deque(f, maxlen=LOG_KEEP) if line.strip())
+        elif legacy_log_file.exists():
+            with open(legacy_log_file, 'r') as f:
+                legacy_logs = json.load(f)
+            # Carry the old history into the JSONL file (atomically), then drop the old file
+            tmp_file = self.log_file.with_name(self.log_file.name + ".tmp")
+            tmp_file.write_bytes(b"".join([_json_bytes(e) + b"\n" for e in legacy_logs]))
+            os.replace(tmp_file, self.log_file)
+            legacy_log_file.unlink()
+            self.logs.extend(legacy_logs)
     
     def _save_config(self):
         """Save webhook configuration"""
-        with open(self.config_file, 'w') as f:
-            json.dump(self.webhooks, f, indent=2)
+        self.config_file.write_bytes(_json_bytes(self.webhooks, indent=True))
+    
+    def _reindex(self):
+        """Rebuild the event -> active webhooks index (after any config change)"""
+        active_by_event: Dict[str, List[Dict]] = {}
+        for webhook in self.webhooks.values():
+            if webhook.get("active", True):
+                active_by_event.setdefault(webhook["event"], []).append(webhook)
+        self._active_by_event = active_by_event
+    
+    @staticmethod
+    def _new_stats() -> Dict:
+        return {"last_triggered": None, "success_count": 0, "failure_count": 0}
+    
+    def _with_stats(self, webhook: Dict) -> Dict:
+        """Webhook config merged with its delivery counters (API view)"""
+        with self._stats_lock:
+            stats = dict(self.stats.get(webhook["id"]) or self._new_stats())
+        return {**webhook, **stats}
+    
+    def _schedule_stats_snapshot(self):
+        """Persist counters within STATS_SNAPSHOT_DELAY; no disk I/O on the trigger path"""
+        with self._stats_lock:
+            if self._stats_timer is None:
+                self._stats_timer = threading.Timer(STATS_SNAPSHOT_DELAY, self.flush_stats)
+                self._stats_timer.daemon = True
+                self._stats_timer.start()
+    
+    def flush_stats(self):
+        """Write delivery counters to disk now (atomic replace)"""
+        with self._stats_write_lock:
+            # Copy under the lock; serialize and write without blocking deliveries
+            with self._stats_lock:
+                if self._stats_timer is not None:
+                    self._stats_timer.cancel()
+                    self._stats_timer = None
+                snapshot = {webhook_id: dict(stats) for webhook_id, stats in self.stats.items()}
+            payload = _json_bytes(snapshot)
+            tmp_file = self.stats_file.with_name(self.stats_file.name + ".tmp")
+            tmp_file.write_bytes(payload)
+            os.replace(tmp_file, self.stats_file)
+    
+    def _append_log(self, entry: Dict):
+        """Record a delivery; the log file is appended in batches"""
+        with self._log_lock:
+            self.logs.append(entry)
+            self._log_buffer.append(entry)
+            if self._log_timer is None:
+                self._log_timer = threading.Timer(LOG_FLUSH_DELAY, self.flush_logs)
+                self._log_timer.daemon = True
+                self._log_timer.start()
     
-    def _save_logs(self):
-        """Save webhook logs"""
-        # Keep only last 1000 logs
-        self.logs = self.logs[-1000:]
-        with open(self.log_file, 'w') as f:
-            json.dump(self.logs, f, indent=2)
+    def flush_logs(self):
+        """Append buffered log entries to disk now"""
+        with self._log_lock:
+            if self._log_timer is not None:
+                self._log_timer.cancel()
+                self._log_timer = None
+            entries, self._log_buffer = self._log_buffer, []
+        
+        if not entries:
+            return
+        
+        with open(self.log_file, 'ab') as f:
+            f.write(b"\n".join([_json_bytes(e) for e in entries]) + b"\n")
+            size = f.tell()
+        
+        # Rotate instead of rewriting history
+        if size > LOG_MAX_BYTES:
+            os.replace(self.log_file, self.log_file.with_name(self.log_file.name + ".1"))
     
     def register_webhook(
         self,
@@ -111,13 +255,14 @@ class WebhookService:
             "secret": secret,
             "headers": headers or {},
             "active": active,
-            "created_at": datetime.now().isoformat(),
-            "last_triggered": None,
-            "success_count": 0,
-            "failure_count": 0
+            "created_at": datetime.now().isoformat()
         }
+        with self._stats_lock:
+            self.stats[webhook_id] = self._new_stats()
+        self._reindex()
         
         self._save_config()
+        self._schedule_stats_snapshot()
         
         return {"success": True, "webhook_id": webhook_id, "event": event}
     
@@ -130,10 +275,11 @@ class WebhookService:
         for key, value in kwargs.items():
             if key in self.webhooks[webhook_id] and key not in ["id", "created_at"]:
                 self.webhooks[webhook_id][key] = value
+        self._reindex()
         
         self._save_config()
         
-        return {"success": True, "webhook": self.webhooks[webhook_id]}
+        return {"success": True, "webhook": self._with_stats(self.webhooks[webhook_id])}
     
     def delete_webhook(self, webhook_id: str) -> Dict:
         """Delete a webhook"""
@@ -142,7 +288,11 @@ class WebhookService:
             return {"success": False, "error": "Webhook not found"}
         
         del self.webhooks[webhook_id]
+        with self._stats_lock:
+            self.stats.pop(webhook_id, None)
+        self._reindex()
         self._save_config()
+        self._schedule_stats_snapshot()
         
         return {"success": True, "deleted": webhook_id}
     
@@ -154,24 +304,39 @@ class WebhookService:
         if event:
             webhooks = [w for w in webhooks if w["event"] == event]
         
-        return webhooks
+        return [self._with_stats(w) for w in webhooks]
     
     def get_webhook(self, webhook_id: str) -> Optional[Dict]:
         """Get webhook by ID"""
-        return self.webhooks.get(webhook_id)
+        webhook = self.webhooks.get(webhook_id)
+        return self._with_stats(webhook) if webhook else None
     
-    def _generate_signature(self, payload: str, secret: str) -> str:
+    def _generate_signature(self, payload: bytes, secret: str) -> str:
         """Generate HMAC signature for payload"""
-        return hmac.new(
-            secret.encode(),
-            payload.encode(),
-            hashlib.sha256
-        ).hexdigest()
+        # Keyed by secret (not webhook id) so a changed secret never reuses an old key
+        signer = self._signers.get(secret)
+        if signer is None:
+            signer = hmac.new(secret.encode(), None, hashlib.sha256)
+            self._signers[secret] = signer
+        mac = signer.copy()
+        mac.update(payload)
+        return mac.hexdigest()
+    
+    @staticmethod
+    def _should_retry(status_code: int) -> bool:
+        """Server errors and rate limits are transient; other 4xx are final"""
+        return status_code >= 500 or status_code == 429
+    
+    @staticmethod
+    def _retry_delay(attempt: int) -> float:
+        """Exponential backoff with jitter so subscribers aren't hit in lockstep"""
+        return WEBHOOK_RETRY_BASE_DELAY * 2 ** (attempt - 1) + random.random() * 0.1
     
-    def _send_webhook_sync(self, webhook: Dict, payload: Dict) -> Dict:
-        """Send webhook synchronously"""
+    def _send_webhook_sync(self, webhook: Dict, payload: Dict, json_payload: bytes = None) -> Dict:
+        """Send webhook synchronously (json_payload: payload already encoded by the caller)"""
         
-        json_payload = json.dumps(payload)
+        if json_payload is None:
+            json_payload = _json_bytes(payload)
         
         headers = {
             "Content-Type": "application/json",
@@ -187,31 +352,41 @@ class WebhookService:
             signature = self._generate_signature(json_payload, webhook["secret"])
             headers["X-MoneyViya-Signature"] = f"sha256={signature}"
         
-        try:
-            if HTTPX_AVAILABLE:
-                with httpx.Client(timeout=10.0) as client:
-                    response = client.post(webhook["url"], content=json_payload, headers=headers)
-            else:
-                response = requests.post(webhook["url"], data=json_payload, headers=headers, timeout=10)
-            
-            success = 200 <= response.status_code < 300
-            
-            return {
-                "success": success,
-                "status_code": response.status_code,
-                "response": response.text[:500]
-            }
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e)
-            }
+        for attempt in range(1, WEBHOOK_MAX_ATTEMPTS + 1):
+            try:
+                if HTTPX_AVAILABLE:
+                    response = get_sync_client().post(webhook["url"], content=json_payload, headers=headers)
+                else:
+                    response = requests.post(webhook["url"], data=json_payload, headers=headers, timeout=10)
+                
+                if attempt < WEBHOOK_MAX_ATTEMPTS and self._should_retry(response.status_code):
+                    time.sleep(self._retry_delay(attempt))
+                    continue
+                
+                success = 200 <= response.status_code < 300
+                
+                return {
+                    "success": success,
+                    "status_code": response.status_code,
+                    "response": response.text[:500],
+                    "attempts": attempt
+                }
+                
+            except Exception as e:
+                if attempt < WEBHOOK_MAX_ATTEMPTS:
+                    time.sleep(self._retry_delay(attempt))
+                    continue
+                return {
+                    "success": False,
+                    "error": str(e),
+                    "attempts": attempt
+                }
     
-    async def _send_webhook_async(self, webhook: Dict, payload: Dict) -> Dict:
+    async def _send_webhook_async(self, webhook: Dict, payload: Dict, json_payload: bytes = None) -> Dict:
         """Send webhook asynchronously"""
         
-        json_payload = json.dumps(payload)
+        if json_payload is None:
+            json_payload = _json_bytes(payload)
         
         headers = {
             "Content-Type": "application/json",
@@ -225,34 +400,37 @@ class WebhookService:
             signature = self._generate_signature(json_payload, webhook["secret"])
             headers["X-MoneyViya-Signature"] = f"sha256={signature}"
         
-        try:
-            if HTTPX_AVAILABLE:
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    response = await client.post(webhook["url"], content=json_payload, headers=headers)
-                    
-                    return {
-                        "success": 200 <= response.status_code < 300,
-                        "status_code": response.status_code
-                    }
-            else:
-                # Fallback to sync
-                return self._send_webhook_sync(webhook, payload)
+        if not HTTPX_AVAILABLE:
+            # Fallback to sync, off the event loop
+            return await asyncio.to_thread(self._send_webhook_sync, webhook, payload, json_payload)
+        
+        for attempt in range(1, WEBHOOK_MAX_ATTEMPTS + 1):
+            try:
+                async with self._send_limit:
+                    response = await get_async_client().post(webhook["url"], content=json_payload, headers=headers)
                 
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+                if attempt < WEBHOOK_MAX_ATTEMPTS and self._should_retry(response.status_code):
+                    await asyncio.sleep(self._retry_delay(attempt))
+                    continue
+                
+                return {
+                    "success": 200 <= response.status_code < 300,
+                    "status_code": response.status_code,
+                    "attempts": attempt
+                }
+                
+            except Exception as e:
+                if attempt < WEBHOOK_MAX_ATTEMPTS:
+                    await asyncio.sleep(self._retry_delay(attempt))
+                    continue
+                return {"success": False, "error": str(e), "attempts": attempt}
     
-    def trigger(self, event: str, data: Dict, user_id: str = None) -> Dict:
-        """Trigger webhooks for an event"""
-        
-        # Find all active webhooks for this event
-        matching_webhooks = [
-            w for w in self.webhooks.values()
-            if w["event"] == event and w.get("active", True)
-        ]
-        
-        if not matching_webhooks:
-            return {"triggered": 0, "message": "No webhooks registered for this event"}
-        
+    def _matching_webhooks(self, event: str) -> List[Dict]:
+        """Find all active webhooks for an event"""
+        return list(self._active_by_event.get(event, ()))
+    
+    def _build_payload(self, event: str, data: Dict, user_id: str = None) -> Dict:
+        """Build the payload sent to every webhook for an event"""
         payload = {
             "event": event,
             "timestamp": datetime.now().isoformat(),
@@ -262,20 +440,101 @@ class WebhookService:
         if user_id:
             payload["user_id"] = user_id
         
+        return payload
+    
+    def trigger(self, event: str, data: Dict, user_id: str = None) -> Dict:
+        """Trigger webhooks for an event (deliveries run concurrently)"""
+        
+        matching_webhooks = self._matching_webhooks(event)
+        
+        if not matching_webhooks:
+            return {"triggered": 0, "message": "No webhooks registered for this event"}
+        
+        payload = self._build_payload(event, data, user_id)
+        json_payload = _json_bytes(payload)  # identical for every subscriber
+        
+        if len(matching_webhooks) == 1:
+            send_results = [self._send_webhook_sync(matching_webhooks[0], payload, json_payload)]
+        else:
+            send_results = list(self._executor.map(
+                lambda webhook: self._send_webhook_sync(webhook, payload, json_payload), matching_webhooks
+            ))
+        
+        return self._record_results(event, matching_webhooks, send_results)
+    
+    async def trigger_async(self, event: str, data: Dict, user_id: str = None) -> Dict:
+        """Trigger webhooks for an event from async code"""
+        
+        matching_webhooks = self._matching_webhooks(event)
+        
+        if not matching_webhooks:
+            return {"triggered": 0, "message": "No webhooks registered for this event"}
+        
+        payload = self._build_payload(event, data, user_id)
+        json_payload = _json_bytes(payload)
+        
+        send_results = await asyncio.gather(
+            *(self._send_webhook_async(webhook, payload, json_payload) for webhook in matching_webhooks),
+            return_exceptions=True
+        )
+        send_results = [
+            {"success": False, "error": str(r)} if isinstance(r, BaseException) else r
+            for r in send_results
+        ]
+        
+        return self._record_results(event, matching_webhooks, send_results)
+    
+    def enqueue(self, event: str, data: Dict, user_id: str = None) -> Dict:
+        """Queue an event for background delivery and return immediately"""
+        
+        matching_count = len(self._matching_webhooks(event))
+        if not matching_count:
+            return {"queued": 0, "message": "No webhooks registered for this event"}
+        
+        if self._dispatcher is None:
+            with self._dispatcher_lock:
+                # A single dispatcher keeps the priority / FIFO order
+                if self._dispatcher is None:
+                    dispatcher = threading.Thread(target=self._dispatch_loop, name="webhook-dispatch", daemon=True)
+                    dispatcher.start()
+                    self._dispatcher = dispatcher
+        
+        priority = 0 if event in PRIORITY_EVENTS else 1
+        self._queue.put((priority, next(self._queue_seq), event, data, user_id))
+        
+        return {"queued": matching_count}
+    
+    def _dispatch_loop(self):
+        """Deliver queued events one after another (each fans out concurrently)"""
+        while True:
+            _, _, event, data, user_id = self._queue.get()
+            try:
+                self.trigger(event, data, user_id)
+            except Exception as e:
+                print(f"[Webhook] Background delivery failed for {event}: {e}")
+            finally:
+                self._queue.task_done()
+    
+    def _record_results(self, event: str, matching_webhooks: List[Dict], send_results: List[Dict]) -> Dict:
+        """Update stats and logs after deliveries complete"""
+        
         results = []
         
-        for webhook in matching_webhooks:
-            result = self._send_webhook_sync(webhook, payload)
-            
-            # Update webhook stats
-            webhook["last_triggered"] = datetime.now().isoformat()
-            if result.get("success"):
-                webhook["success_count"] = webhook.get("success_count", 0) + 1
-            else:
-                webhook["failure_count"] = webhook.get("failure_count", 0) + 1
+        for webhook, result in zip(matching_webhooks, send_results):
+            # Update webhook stats (in memory; snapshotted later)
+            retries = result.get("attempts", 1) - 1
+            with self._stats_lock:
+                stats = self.stats.setdefault(webhook["id"], self._new_stats())
+                stats["last_triggered"] = datetime.now().isoformat()
+                if result.get("success"):
+                    stats["success_count"] += 1
+                else:
+                    stats["failure_count"] += 1
+                if retries:
+                    stats["retry_count"] = stats.get("retry_count", 0) + retries
             
             # Log the webhook call
-            self.logs.append({
+            self._append_log({
                 "webhook_id": webhook["id"],
                 "event": event,
                 "timestamp": datetime.now().isoformat(),
@@ -290,8 +549,7 @@ class WebhookService:
                 "success": result.get("success", False)
             })
         
-        self._save_config()
-        self._save_logs()
+        self._schedule_stats_snapshot()
         
         return {
             "triggered": len(results),
@@ -317,7 +575,7 @@ class WebhookService:
         result = self._send_webhook_sync(webhook, test_payload)
         
         # Log test
-        self.logs.append({
+        self._append_log({
             "webhook_id": webhook_id,
             "event": "test",
             "timestamp": datetime.now().isoformat(),
@@ -325,14 +583,13 @@ class WebhookService:
             "status_code": result.get("status_code"),
             "error": result.get("error")
         })
-        self._save_logs()
         
         return result
     
     def get_logs(self, webhook_id: str = None, limit: int = 100) -> List[Dict]:
         """Get webhook logs"""
         
-        logs = self.logs
+        logs = list(self.logs)
         
         if webhook_id:
             logs = [l for l in logs if l.get("webhook_id") == webhook_id]
@@ -349,8 +606,9 @@ class WebhookService:
         total_webhooks = len(self.webhooks)
         active_webhooks = len([w for w in self.webhooks.values() if w.get("active", True)])
         
-        total_success = sum(w.get("success_count", 0) for w in self.webhooks.values())
-        total_failure = sum(w.get("failure_count", 0) for w in self.webhooks.values())
+        with self._stats_lock:
+            total_success = sum(s["success_count"] for s in self.stats.values())
+            total_failure = sum(s["failure_count"] for s in self.stats.values())
         
         return {
             "total_webhooks": total_webhooks,
@@ -366,26 +624,26 @@ webhook_service = WebhookService()
 
 # Helper functions for easy triggering
 def trigger_transaction_created(transaction: Dict, user_id: str):
-    """Trigger webhook when transaction is created"""
-    return webhook_service.trigger("transaction.created", transaction, user_id)
+    """Queue webhook when transaction is created"""
+    return webhook_service.enqueue("transaction.created", transaction, user_id)
 
 def trigger_user_created(user: Dict):
-    """Trigger webhook when user is created"""
-    return webhook_service.trigger("user.created", user, user.get("phone"))
+    """Queue webhook when user is created"""
+    return webhook_service.enqueue("user.created", user, user.get("phone"))
 
 def trigger_goal_achieved(goal: Dict, user_id: str):
-    """Trigger webhook when goal is achieved"""
-    return webhook_service.trigger("goal.achieved", goal, user_id)
+    """Queue webhook when goal is achieved"""
+    return webhook_service.enqueue("goal.achieved", goal, user_id)
 
 def trigger_fraud_detected(alert: Dict, user_id: str):
-    """Trigger webhook when fraud is detected"""
-    return webhook_service.trigger("fraud.detected", alert, user_id)
+    """Queue webhook when fraud is detected"""
+    return webhook_service.enqueue("fraud.detected", alert, user_id)
 
 def trigger_backup_completed(backup: Dict):
-    """Trigger webhook when backup completes"""
-    return webhook_service.trigger("backup.completed", backup)
+    """Queue webhook when backup completes"""
+    return webhook_service.enqueue("backup.completed", backup)
 
 def trigger_bill_due(bill: Dict, user_id: str):
-    """Trigger webhook when bill is due"""
-    return webhook_service.trigger("bill.due", bill, user_id)
+    """Queue webhook when bill is due"""
+    return webhook_service.enqueue("bill.due", bill, user_id)
 
@@ -4,9 +4,22 @@ Official Meta API - Free for 1000 conversations/month
 """
 
 import os
-import requests
+import atexit
+import threading
 from typing import Dict, Any, Optional
 
+import httpx
+
+# HTTP/2 lets concurrent sends share one connection (needs the h2 package)
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Characters stripped from phone numbers before sending (one pass)
+_PHONE_STRIP = str.maketrans("", "", "+ -")
+
 class WhatsAppCloudAPIService:
     """
     WhatsApp Business Cloud API integration
@@ -17,6 +30,10 @@ class WhatsAppCloudAPIService:
     
     def __init__(self):
         self.api_version = "v18.0"
+        self._http: Optional[httpx.Client] = None
+        self._http_config = None  # (token, phone_id) the client was built for
+        self._http_lock = threading.Lock()
+        atexit.register(self._close_client)
     
     @property
     def access_token(self):
@@ -43,6 +60,28 @@ class WhatsAppCloudAPIService:
             "Content-Type": "application/json"
         }
     
+    def _client(self) -> httpx.Client:
+        """Persistent Graph API client; rebuilt if the token or phone id changes"""
+        config = (self.access_token, self.phone_number_id)
+        if self._http is None or self._http_config != config:
+            with self._http_lock:
+                if self._http is None or self._http_config != config:
+                    if self._http is not None:
+                        self._http.close()
+                    self._http = httpx.Client(
+                        base_url=self.base_url,
+                        http2=HTTP2_AVAILABLE,
+                        timeout=30.0,
+                        limits=httpx.Limits(max_keepalive_connections=10),
+                        headers=self._get_headers()
+                    )
+                    self._http_config = config
+        return self._http
+    
+    def _close_client(self):
+        if self._http is not None:
+            self._http.close()
+    
     def send_text_message(self, phone: str, message: str) -> dict:
         """
         Send text message via WhatsApp Cloud API
@@ -55,12 +94,11 @@ class WhatsAppCloudAPIService:
             return {"success": False, "error": "WhatsApp Cloud API not configured"}
         
         # Clean phone number
-        phone = phone.replace("+", "").replace(" ", "").replace("-", "")
+        phone = phone.translate(_PHONE_STRIP)
         
         try:
-            response = requests.post(
-                f"{self.base_url}/messages",
-                headers=self._get_headers(),
+            response = self._client().post(
+                "/messages",
                 json={
                     "messaging_product": "whatsapp",
                     "recipient_type": "individual",
@@ -70,11 +108,10 @@ class WhatsAppCloudAPIService:
                         "preview_url": False,
                         "body": message
                     }
-                },
-                timeout=30
+                }
             )
             
-            if response.ok:
+            if response.is_success:
                 return {"success": True, "data": response.json()}
             else:
                 return {"success": False, "error": response.text}
@@ -92,7 +129,7 @@ class WhatsAppCloudAPIService:
         if not self.is_available():
             return {"success": False, "error": "Not configured"}
         
-        phone = phone.replace("+", "").replace(" ", "")
+        phone = phone.translate(_PHONE_STRIP)
         
         payload = {
             "messaging_product": "whatsapp",
@@ -108,14 +145,12 @@ class WhatsAppCloudAPIService:
             payload["template"]["components"] = components
         
         try:
-            response = requests.post(
-                f"{self.base_url}/messages",
-                headers=self._get_headers(),
-                json=payload,
-                timeout=30
+            response = self._client().post(
+                "/messages",
+                json=payload
             )
             
-            if response.ok:
+            if response.is_success:
                 return {"success": True, "data": response.json()}
             return {"success": False, "error": response.text}
             
@@ -127,12 +162,11 @@ class WhatsAppCloudAPIService:
         if not self.is_available():
             return {"success": False, "error": "Not configured"}
         
-        phone = phone.replace("+", "").replace(" ", "")
+        phone = phone.translate(_PHONE_STRIP)
         
         try:
-            response = requests.post(
-                f"{self.base_url}/messages",
-                headers=self._get_headers(),
+            response = self._client().post(
+                "/messages",
                 json={
                     "messaging_product": "whatsapp",
                     "to": phone,
@@ -141,11 +175,10 @@ class WhatsAppCloudAPIService:
                         "link": image_url,
                         "caption": caption
                     }
-                },
-                timeout=30
+                }
             )
             
-            if response.ok:
+            if response.is_success:
                 return {"success": True, "data": response.json()}
             return {"success": False, "error": response.text}
             
@@ -158,12 +191,11 @@ class WhatsAppCloudAPIService:
         if not self.is_available():
             return {"success": False, "error": "Not configured"}
         
-        phone = phone.replace("+", "").replace(" ", "")
+        phone = phone.translate(_PHONE_STRIP)
         
         try:
-            response = requests.post(
-                f"{self.base_url}/messages",
-                headers=self._get_headers(),
+            response = self._client().post(
+                "/messages",
                 json={
                     "messaging_product": "whatsapp",
                     "to": phone,
@@ -173,11 +205,10 @@ class WhatsAppCloudAPIService:
                         "filename": filename,
                         "caption": caption
                     }
-                },
-                timeout=30
+                }
             )
             
-            if response.ok:
+            if response.is_success:
                 return {"success": True, "data": response.json()}
             return {"success": False, "error": response.text}
             
@@ -189,12 +220,11 @@ class WhatsAppCloudAPIService:
         if not self.is_available():
             return {"success": False, "error": "Not configured"}
         
-        phone = phone.replace("+", "").replace(" ", "")
+        phone = phone.translate(_PHONE_STRIP)
         
         try:
-            response = requests.post(
-                f"{self.base_url}/messages",
-                headers=self._get_headers(),
+            response = self._client().post(
+                "/messages",
                 json={
                     "messaging_product": "whatsapp",
                     "to": phone,
@@ -202,11 +232,10 @@ class WhatsAppCloudAPIService:
                     "audio": {
                         "link": audio_url
                     }
-                },
-                timeout=30
+                }
             )
             
-            if response.ok:
+            if response.is_success:
                 return {"success": True, "data": response.json()}
             return {"success": False, "error": response.text}
             
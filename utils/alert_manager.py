@@ -1,24 +1,75 @@
+import atexit
 import csv
+import os
+import threading
 import uuid
 from datetime import datetime
 from pathlib import Path
 
 ALERT_FILE = Path("data/alerts.csv")
 
+# Alerts are buffered and appended together at most this often (seconds)
+ALERT_FLUSH_DELAY = 0.5
+
+_alert_buffer = []
+_alert_lock = threading.Lock()
+_write_lock = threading.Lock()  # one flush writes at a time, keeping rows in order
+_flush_timer = None
+
 def create_alert(user_id, txn, fraud_result):
+    global _flush_timer
     alert_id = str(uuid.uuid4())
 
-    with open(ALERT_FILE, mode="a", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow([
-            alert_id,
-            user_id,
-            txn["amount"],
-            fraud_result["decision"],
-            "PENDING",
-            "; ".join(fraud_result["reasons"]),
-            datetime.now().isoformat()
-        ])
+    row = [
+        alert_id,
+        user_id,
+        txn["amount"],
+        fraud_result["decision"],
+        "PENDING",
+        "; ".join(fraud_result["reasons"]),
+        datetime.now().isoformat()
+    ]
+
+    with _alert_lock:
+        _alert_buffer.append(row)
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(ALERT_FLUSH_DELAY, flush_alerts)
+            _flush_timer.daemon = True
+            _flush_timer.start()
 
     return alert_id
 
+
+def flush_alerts():
+    """Append all buffered alerts with one open/write/fsync"""
+    global _flush_timer
+
+    with _write_lock:
+        # Take the buffered rows; create_alert isn't blocked by the write below
+        with _alert_lock:
+            if _flush_timer is not None:
+                _flush_timer.cancel()
+                _flush_timer = None
+            rows = _alert_buffer[:]
+            _alert_buffer.clear()
+
+        if not rows:
+            return
+
+        try:
+            with open(ALERT_FILE, mode="a", newline="") as file:
+                csv.writer(file).writerows(rows)
+                file.flush()
+                os.fsync(file.fileno())
+        except OSError as e:
+            print(f"[Alerts] Write failed, will retry: {e}")
+            # Put the rows back ahead of newer alerts and try again later
+            with _alert_lock:
+                _alert_buffer[:0] = rows
+                if _flush_timer is None:
+                    _flush_timer = threading.Timer(ALERT_FLUSH_DELAY, flush_alerts)
+                    _flush_timer.daemon = True
+                    _flush_timer.start()
+
+
+atexit.register(flush_alerts)
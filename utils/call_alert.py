@@ -1,15 +1,15 @@
-from utils.twilio_client import client
+from utils.twilio_client import get_client
+
+TWIML_TEMPLATE = '<Response><Say language="en">{0}</Say></Response>'
+
+# Escape XML special characters so any message yields valid TwiML
+_XML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
 
 def make_fraud_call(to_number, message):
-    twiml = f"""
-    <Response>
-        <Say language="en">{message}</Say>
-    </Response>
-    """
+    twiml = TWIML_TEMPLATE.format(message.translate(_XML_ESCAPE))
 
-    client.calls.create(
+    get_client().calls.create(
         to=to_number,
         from_="+14155238886",  # Twilio voice number
         twiml=twiml
     )
-
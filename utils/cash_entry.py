@@ -1,7 +1,11 @@
+from collections import defaultdict
 from datetime import datetime
 
-# Temporary in-memory DB (we’ll upgrade later)
-CASH_DB = []
+# Temporary in-memory DB (we’ll upgrade later), records grouped per user
+CASH_DB_BY_USER = defaultdict(list)
+
+# Running per-user totals kept in step with CASH_DB_BY_USER
+CASH_TOTALS = defaultdict(lambda: {"income_total": 0, "expense_total": 0, "days": set()})
 
 def save_cash_entry(user_id: str, amount: int, entry_type: str = "income"):
     record = {
@@ -11,23 +15,29 @@ def save_cash_entry(user_id: str, amount: int, entry_type: str = "income"):
         "source": "CASH",
         "timestamp": datetime.utcnow().isoformat()
     }
-    CASH_DB.append(record)
+    CASH_DB_BY_USER[user_id].append(record)
+
+    totals = CASH_TOTALS[user_id]
+    if entry_type == "income":
+        totals["income_total"] += amount
+    elif entry_type == "expense":
+        totals["expense_total"] += amount
+    totals["days"].add(record["timestamp"][:10])
     return record
 
 
 def calculate_monthly_estimate(user_id: str):
-    user_records = [r for r in CASH_DB if r["user_id"] == user_id]
-
-    total = sum(r["amount"] for r in user_records if r["type"] == "income")
+    totals = CASH_TOTALS.get(user_id)
+    if totals is None:
+        return 0
 
-    # Simple estimate: avg daily × 30
-    days = max(1, len(set(r["timestamp"][:10] for r in user_records)))
-    daily_avg = total / days
+    # Simple estimate: avg daily × 30 (days with any cash entry)
+    days = max(1, len(totals["days"]))
+    daily_avg = totals["income_total"] / days
     monthly_estimate = int(daily_avg * 30)
 
     return monthly_estimate
 
 def calculate_monthly_expense(user_id: str):
-    user_records = [r for r in CASH_DB if r["user_id"] == user_id and r["type"] == "expense"]
-    return sum(r["amount"] for r in user_records)
-
+    totals = CASH_TOTALS.get(user_id)
+    return totals["expense_total"] if totals else 0
@@ -0,0 +1,63 @@
+import importlib.util
+import os
+import threading
+from pathlib import Path
+from urllib.parse import quote
+
+DAILY_INCOME_DIR = Path("data/daily_income")
+
+# Parquet needs pyarrow; without it callers fall back to scanning transactions.csv
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# Held while a user's file is built or updated. save_transaction holds it across
+# the csv append and add_income, so a concurrent build never counts a row twice.
+income_store_lock = threading.RLock()
+
+def _path(user_id):
+    return DAILY_INCOME_DIR / f"{quote(str(user_id), safe='')}.parquet"
+
+
+def load_daily_income(user_id):
+    """
+    Returns the user's stored daily income (ds, y),
+    or None if it hasn't been built yet
+    """
+    import pandas as pd
+
+    path = _path(user_id)
+    if not path.exists():
+        return None
+
+    return pd.read_parquet(path)
+
+
+def write_daily_income(user_id, df):
+    DAILY_INCOME_DIR.mkdir(parents=True, exist_ok=True)
+
+    path = _path(user_id)
+    tmp_path = path.with_name(path.name + ".tmp")
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def add_income(user_id, timestamp, amount):
+    """Add an income transaction to the user's stored daily totals (if built)"""
+    import pandas as pd
+
+    with income_store_lock:
+        df = load_daily_income(user_id)
+        if df is None:
+            return
+
+        day = pd.Timestamp(timestamp).normalize()
+        same_day = df["ds"] == day
+
+        # Totals are summed in float64 (older files may hold float32)
+        df = df.astype({"y": "float64"})
+        if same_day.any():
+            df.loc[same_day, "y"] += float(amount)
+        else:
+            row = pd.DataFrame({"ds": [day], "y": [float(amount)]}).astype(df.dtypes.to_dict())
+            df = pd.concat([df, row], ignore_index=True).sort_values("ds", ignore_index=True)
+
+        write_daily_income(user_id, df)
@@ -1,3 +1,13 @@
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+SAFE_EMI_RATIO = 0.30
+AGGRESSIVE_EMI_RATIO = 0.40
+
+
 def calculate_safe_emi(prediction: dict):
     """
     Calculates safe and aggressive EMI amounts
@@ -9,11 +19,40 @@ def calculate_safe_emi(prediction: dict):
     worst_case = prediction["worst_case_income"]
     expected = prediction["expected_income"]
 
-    safe_emi = round(worst_case * 0.30, 2)
-    aggressive_emi = round(expected * 0.40, 2)
+    safe_emi = round(worst_case * SAFE_EMI_RATIO, 2)
+    aggressive_emi = round(expected * AGGRESSIVE_EMI_RATIO, 2)
 
     return {
         "safe_emi": safe_emi,
         "aggressive_emi": aggressive_emi
     }
 
+
+def calculate_safe_emi_batch(predictions: list):
+    """
+    calculate_safe_emi for many predictions at once
+    (one numpy pass when numpy is installed)
+    """
+
+    if not NUMPY_AVAILABLE:
+        return [calculate_safe_emi(p) for p in predictions]
+
+    valid = [i for i, p in enumerate(predictions) if "worst_case_income" in p]
+    results = [None] * len(predictions)
+    if not valid:
+        return results
+
+    worst_case = np.fromiter((predictions[i]["worst_case_income"] for i in valid), dtype=float, count=len(valid))
+    expected = np.fromiter((predictions[i]["expected_income"] for i in valid), dtype=float, count=len(valid))
+
+    # Multiply in numpy, but round with Python's round() (np.round differs on ties)
+    safe = (worst_case * SAFE_EMI_RATIO).tolist()
+    aggressive = (expected * AGGRESSIVE_EMI_RATIO).tolist()
+
+    for i, safe_emi, aggressive_emi in zip(valid, safe, aggressive):
+        results[i] = {
+            "safe_emi": round(safe_emi, 2),
+            "aggressive_emi": round(aggressive_emi, 2)
+        }
+
+    return results
@@ -1,20 +1,16 @@
-import csv
 import statistics
 
-TRANSACTION_FILE = "data/transactions.csv"
+from utils.txn_cache import get_user_transactions
 
 def is_amount_spike(user_id, amount):
     """
     Detects abnormal high amount compared to history
     """
 
-    amounts = []
-
-    with open(TRANSACTION_FILE, mode="r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if row["user_id"] == user_id and row["category"] == "EXPENSE":
-                amounts.append(float(row["amount"]))
+    amounts = [
+        row["amount"] for row in get_user_transactions(user_id)
+        if row["category"] == "EXPENSE"
+    ]
 
     if len(amounts) < 5:
         return False  # not enough history
@@ -22,4 +18,3 @@ def is_amount_spike(user_id, amount):
     avg = statistics.mean(amounts)
 
     return amount > (avg * 3)
-
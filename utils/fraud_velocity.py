@@ -1,7 +1,6 @@
-import csv
 from datetime import datetime, timedelta
 
-TRANSACTION_FILE = "data/transactions.csv"
+from utils.txn_cache import get_user_transactions
 
 def count_recent_transactions(user_id, minutes=10):
     """
@@ -11,17 +10,4 @@ def count_recent_transactions(user_id, minutes=10):
     now = datetime.now()
     window_start = now - timedelta(minutes=minutes)
 
-    count = 0
-
-    with open(TRANSACTION_FILE, mode="r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if row["user_id"] != user_id:
-                continue
-
-            txn_time = datetime.fromisoformat(row["timestamp"])
-            if txn_time >= window_start:
-                count += 1
-
-    return count
-
+    return sum(1 for row in get_user_transactions(user_id) if row["timestamp"] >= window_start)
@@ -1,8 +1,6 @@
-import csv
 from collections import defaultdict
-from datetime import datetime
 
-TRANSACTION_FILE = "data/transactions.csv"
+from utils.txn_cache import get_user_transactions
 
 def get_monthly_income(user_id):
     """
@@ -12,19 +10,12 @@ def get_monthly_income(user_id):
 
     monthly_income = defaultdict(float)
 
-    with open(TRANSACTION_FILE, mode="r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if row["user_id"] != user_id:
-                continue
+    for row in get_user_transactions(user_id):
+        if row["category"] != "INCOME":
+            continue
 
-            if row["category"] != "INCOME":
-                continue
+        month_key = row["timestamp"].strftime("%Y-%m")
 
-            timestamp = datetime.fromisoformat(row["timestamp"])
-            month_key = timestamp.strftime("%Y-%m")
-
-            monthly_income[month_key] += float(row["amount"])
+        monthly_income[month_key] += row["amount"]
 
     return dict(monthly_income)
-
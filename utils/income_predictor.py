@@ -1,4 +1,79 @@
-from prophet import Prophet
+import hashlib
+import json
+import os
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+# Prophet (cmdstanpy, matplotlib, ...) is imported on the first fit
+_Prophet = None
+
+# Forecasts are memoized per (income series, day) on disk and in memory,
+# so repeated requests for the same user skip the Prophet fit
+FORECAST_CACHE_DIR = Path("data/forecast_cache")
+
+_forecast_cache = {}
+
+# Seasonal terms are only fitted once the history covers a few cycles
+WEEKLY_SEASONALITY_MIN_DAYS = 21
+YEARLY_SEASONALITY_MIN_DAYS = 365
+
+# Trajectories sampled for yhat_lower / yhat_upper (Prophet default is 1000)
+UNCERTAINTY_SAMPLES = 100
+
+def _get_prophet():
+    global _Prophet
+    if _Prophet is None:
+        from prophet import Prophet
+        _Prophet = Prophet
+    return _Prophet
+
+
+def _forecast_key(df):
+    digest = hashlib.blake2b(
+        pd.util.hash_pandas_object(df, index=False).values.tobytes(),
+        digest_size=16
+    ).hexdigest()
+    return f"{date.today().isoformat()}_{digest}"
+
+
+def _load_forecast(key):
+    if key in _forecast_cache:
+        return _forecast_cache[key]
+
+    path = FORECAST_CACHE_DIR / f"{key}.json"
+    try:
+        with open(path, "r") as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    _forecast_cache[key] = result
+    return result
+
+
+def _store_forecast(key, result):
+    today = key.split("_", 1)[0]
+
+    # Drop entries from previous days
+    for stale in [k for k in _forecast_cache if not k.startswith(today)]:
+        del _forecast_cache[stale]
+    _forecast_cache[key] = result
+
+    try:
+        FORECAST_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for path in FORECAST_CACHE_DIR.glob("*.json"):
+            if not path.name.startswith(today):
+                path.unlink(missing_ok=True)
+
+        tmp_path = FORECAST_CACHE_DIR / f"{key}.json.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(result, f)
+        os.replace(tmp_path, FORECAST_CACHE_DIR / f"{key}.json")
+    except OSError as e:
+        print(f"[Forecast] Cache write failed: {e}")
+
 
 def predict_next_month_income(df):
     """
@@ -12,11 +87,22 @@ def predict_next_month_income(df):
             "message": "At least 10 days of income data required"
         }
 
-    # Initialize Prophet model
+    key = _forecast_key(df)
+    cached = _load_forecast(key)
+    if cached is not None:
+        return dict(cached)
+
+    ds = pd.to_datetime(df["ds"])
+    history_days = (ds.max() - ds.min()).days
+
+    # Initialize Prophet model (MAP fit, no MCMC)
+    Prophet = _get_prophet()
     model = Prophet(
         daily_seasonality=False,
-        weekly_seasonality=True,
-        yearly_seasonality=True
+        weekly_seasonality=history_days >= WEEKLY_SEASONALITY_MIN_DAYS,
+        yearly_seasonality=history_days >= YEARLY_SEASONALITY_MIN_DAYS,
+        mcmc_samples=0,
+        uncertainty_samples=UNCERTAINTY_SAMPLES
     )
 
     # Train model
@@ -29,18 +115,20 @@ def predict_next_month_income(df):
     # Extract next 30 days
     next_30 = forecast.tail(30)
 
-    expected_income = next_30["yhat"].sum()
-    best_case = next_30["yhat_upper"].sum()
-    worst_case = next_30["yhat_lower"].sum()
+    expected_income = float(next_30["yhat"].sum())
+    best_case = float(next_30["yhat_upper"].sum())
+    worst_case = float(next_30["yhat_lower"].sum())
 
     confidence = round(
         (expected_income - worst_case) / expected_income * 100, 2
     ) if expected_income > 0 else 0
 
-    return {
+    result = {
         "expected_income": round(expected_income, 2),
         "best_case_income": round(best_case, 2),
         "worst_case_income": round(worst_case, 2),
         "confidence_percent": confidence
     }
 
+    _store_forecast(key, result)
+    return dict(result)
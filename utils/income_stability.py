@@ -1,5 +1,13 @@
 import statistics
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+STABILITY_REMARKS = ("Highly Irregular", "Moderately Irregular", "Stable Income")
+
 def calculate_income_stability(monthly_income: dict):
     """
     Returns:
@@ -16,10 +24,14 @@ def calculate_income_stability(monthly_income: dict):
             "remark": "Not enough data"
         }
 
-    incomes = list(monthly_income.values())
-
-    avg_income = statistics.mean(incomes)
-    std_dev = statistics.stdev(incomes)
+    if NUMPY_AVAILABLE:
+        incomes = np.fromiter(monthly_income.values(), dtype=np.float64, count=len(monthly_income))
+        avg_income = float(incomes.mean())
+        std_dev = float(incomes.std(ddof=1))
+    else:
+        incomes = list(monthly_income.values())
+        avg_income = statistics.mean(incomes)
+        std_dev = statistics.stdev(incomes)
 
     # Volatility ratio
     volatility = std_dev / avg_income if avg_income > 0 else 0
@@ -27,12 +39,8 @@ def calculate_income_stability(monthly_income: dict):
     # Stability score (higher is better)
     stability_score = max(0, 100 - int(volatility * 100))
 
-    if stability_score >= 70:
-        remark = "Stable Income"
-    elif stability_score >= 40:
-        remark = "Moderately Irregular"
-    else:
-        remark = "Highly Irregular"
+    # Bucket 0 / 1 / 2 for scores below 40 / 40-69 / 70+
+    remark = STABILITY_REMARKS[(stability_score >= 40) + (stability_score >= 70)]
 
     return {
         "average_income": round(avg_income, 2),
@@ -1,10 +1,18 @@
-import csv
-from collections import defaultdict
-from datetime import datetime
 import pandas as pd
 
+from utils.daily_income_store import (
+    PARQUET_AVAILABLE, income_store_lock, load_daily_income, write_daily_income
+)
+from utils.storage import flush_transactions
+
 TRANSACTION_FILE = "data/transactions.csv"
 
+# Rows parsed per pandas chunk; bounds memory on large transaction files
+CHUNK_ROWS = 200_000
+
+# Read-ahead buffer for the transaction file (default is 8 KiB)
+READ_BUFFER_SIZE = 1 << 20
+
 def build_daily_income_series(user_id):
     """
     Returns a DataFrame with:
@@ -12,30 +20,58 @@ def build_daily_income_series(user_id):
     y  = daily income
     """
 
-    daily_income = defaultdict(float)
+    if not PARQUET_AVAILABLE:
+        df = _scan_daily_income(user_id)
+    else:
+        # Served from the user's pre-aggregated file, built from the csv on first use
+        # and kept current by save_transaction
+        with income_store_lock:
+            df = load_daily_income(user_id)
+            if df is None:
+                flush_transactions()
+                df = _scan_daily_income(user_id)
+                if df is not None:
+                    write_daily_income(user_id, df)
 
-    with open(TRANSACTION_FILE, mode="r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if row["user_id"] != user_id:
-                continue
+    if df is None or df.empty:
+        return None
 
-            if row["category"] != "INCOME":
-                continue
+    # Totals are kept in float64; Prophet only needs float32
+    return df.astype({"y": "float32"})
+
+
+def _scan_daily_income(user_id):
+    """Daily income totals computed from a full scan of transactions.csv"""
 
-            date = datetime.fromisoformat(row["timestamp"]).date()
-            daily_income[date] += float(row["amount"])
+    parts = []
 
-    # Convert to DataFrame
-    data = {
-        "ds": list(daily_income.keys()),
-        "y": list(daily_income.values())
-    }
+    with open(TRANSACTION_FILE, mode="r", buffering=READ_BUFFER_SIZE, newline="") as file:
+        chunks = pd.read_csv(
+            file,
+            chunksize=CHUNK_ROWS,
+            usecols=["user_id", "category", "timestamp", "amount"],
+            dtype={"user_id": "category", "category": "category", "timestamp": str, "amount": "float64"}
+        )
+
+        for chunk in chunks:
+            chunk = chunk[(chunk["user_id"] == user_id) & (chunk["category"] == "INCOME")]
+            if chunk.empty:
+                continue
 
-    df = pd.DataFrame(data)
+            # Timestamps are ISO-8601, so the first 10 characters are the date;
+            # only the matching rows are touched and nothing is parsed yet
+            parts.append(chunk.groupby(chunk["timestamp"].str[:10])["amount"].sum())
 
-    if df.empty:
+    if not parts:
         return None
 
-    return df.sort_values("ds")
+    # A day can straddle two chunks, so sum again after concatenating.
+    # groupby sorts its keys, and ISO dates sort chronologically as strings.
+    daily = pd.concat(parts).groupby(level=0).sum()
 
+    # datetime64[ns] dates, ready for Prophet without conversion; y stays float64
+    # here (it is what the parquet store keeps adding to)
+    return pd.DataFrame({
+        "ds": pd.to_datetime(daily.index).astype("datetime64[ns]"),
+        "y": daily.to_numpy(dtype="float64")
+    })
@@ -1,3 +1,9 @@
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 def classify_months(monthly_income: dict):
     """
     Classifies months into GOOD / BAD
@@ -6,6 +12,11 @@ def classify_months(monthly_income: dict):
     if not monthly_income:
         return {}
 
+    if NUMPY_AVAILABLE:
+        incomes = np.fromiter(monthly_income.values(), dtype=np.float64, count=len(monthly_income))
+        labels = np.where(incomes >= incomes.mean(), "GOOD", "BAD")
+        return dict(zip(monthly_income.keys(), labels.tolist()))
+
     avg_income = sum(monthly_income.values()) / len(monthly_income)
 
     month_classification = {}
@@ -17,4 +28,3 @@ def classify_months(monthly_income: dict):
             month_classification[month] = "BAD"
 
     return month_classification
-
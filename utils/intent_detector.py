@@ -1,47 +1,107 @@
 import re
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+_AMOUNT_RE = re.compile(r"(\d+)")
+
+# Verbs (with inflections) that make a cash entry an expense;
+# "payment" / "payout" are nouns and don't count
+_EXPENSE_VERB_RE = re.compile(r"\b(?:spent|pay(?:s|ing|ed)?|paid|gave)\b")
+
+# Intent keywords, in priority order (first intent found wins)
+INTENT_KEYWORDS = [
+    ("GREETING", ["hi", "hello", "hey"]),
+    ("FRAUD_QUERY", ["fraud", "scam", "scammed", "cheated"]),
+    ("LOAN_QUERY", ["loan", "emi", "borrow"]),
+    ("INVESTMENT_QUERY", ["invest", "sip", "stocks", "mutual"]),
+    ("DASHBOARD_QUERY", ["dashboard", "summary", "report", "monthly"]),
+    ("INCOME_QUERY", ["income", "earn", "salary", "made"]),
+    ("EXPENSE_QUERY", ["expense", "spent", "spend"]),
+]
+
+# Intents whose keywords must be whole words ("hi" but not "this")
+WHOLE_WORD_INTENTS = {"GREETING"}
+
+# Intents that never carry an amount
+NO_AMOUNT_INTENTS = {"GREETING", "DASHBOARD_QUERY"}
+
+_INTENT_PRIORITY = {intent: i for i, (intent, _) in enumerate(INTENT_KEYWORDS)}
+
+
+def _keyword_pattern(intent, words):
+    alternation = "|".join(map(re.escape, words))
+    if intent in WHOLE_WORD_INTENTS:
+        return rf"\b(?:{alternation})\b"
+    return alternation
+
+
+# All keywords fused into one pattern with a named group per intent.
+# Matching inside a lookahead tries every position, so keywords that
+# overlap in the text are all seen in a single pass.
+_INTENT_RE = re.compile(
+    "(?=" + "|".join(
+        f"(?P<{intent}>{_keyword_pattern(intent, words)})" for intent, words in INTENT_KEYWORDS
+    ) + ")"
+)
+
+# With pyahocorasick installed, one automaton finds every keyword in a single scan
+_INTENT_AUTOMATON = None
+if AHOCORASICK_AVAILABLE:
+    _INTENT_AUTOMATON = ahocorasick.Automaton()
+    for _intent, _words in INTENT_KEYWORDS:
+        for _word in _words:
+            _INTENT_AUTOMATON.add_word(_word, (_intent, len(_word)))
+    _INTENT_AUTOMATON.make_automaton()
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+def _find_intent(text_l):
+    """Highest-priority intent with a keyword in text_l, or None"""
+    if _INTENT_AUTOMATON is None:
+        found = {m.lastgroup for m in _INTENT_RE.finditer(text_l)}
+        for intent, _ in INTENT_KEYWORDS:
+            if intent in found:
+                return intent
+        return None
+
+    best = None
+    for end, (intent, length) in _INTENT_AUTOMATON.iter(text_l):
+        if best is not None and _INTENT_PRIORITY[intent] >= _INTENT_PRIORITY[best]:
+            continue
+        if intent in WHOLE_WORD_INTENTS:
+            start = end - length + 1
+            if start > 0 and _is_word_char(text_l[start - 1]):
+                continue
+            if end + 1 < len(text_l) and _is_word_char(text_l[end + 1]):
+                continue
+        best = intent
+    return best
+
+
 def detect_intent(text: str):
     text_l = text.lower()
 
-    amount_match = re.search(r"(\d+)", text_l)
+    amount_match = _AMOUNT_RE.search(text_l)
     amount = int(amount_match.group(1)) if amount_match else None
 
     # CASH ENTRY (income or expense)
     if "cash" in text_l and amount:
-        entry_type = "expense" if any(w in text_l for w in ["spent", "pay", "paid", "gave"]) else "income"
+        entry_type = "expense" if _EXPENSE_VERB_RE.search(text_l) else "income"
         return {
             "intent": "CASH_ENTRY",
             "amount": amount,
             "entry_type": entry_type
         }
 
-
-    # 2️⃣ GREETING
-    if any(w in text_l for w in ["hi", "hello", "hey"]):
-        return {"intent": "GREETING", "amount": None}
-
-    # 3️⃣ FRAUD
-    if any(w in text_l for w in ["fraud", "scam", "scammed", "cheated"]):
-        return {"intent": "FRAUD_QUERY", "amount": amount}
-
-    # 4️⃣ LOAN
-    if any(w in text_l for w in ["loan", "emi", "borrow"]):
-        return {"intent": "LOAN_QUERY", "amount": amount}
-
-    # 5️⃣ INVESTMENT
-    if any(w in text_l for w in ["invest", "sip", "stocks", "mutual"]):
-        return {"intent": "INVESTMENT_QUERY", "amount": amount}
-
-    # 6️⃣ DASHBOARD
-    if any(w in text_l for w in ["dashboard", "summary", "report", "monthly"]):
-        return {"intent": "DASHBOARD_QUERY", "amount": None}
-
-    # 7️⃣ INCOME / EXPENSE QUERIES
-    if any(w in text_l for w in ["income", "earn", "salary", "made"]):
-        return {"intent": "INCOME_QUERY", "amount": amount}
-
-    if any(w in text_l for w in ["expense", "spent", "spend"]):
-        return {"intent": "EXPENSE_QUERY", "amount": amount}
+    intent = _find_intent(text_l)
+    if intent is not None:
+        return {"intent": intent, "amount": None if intent in NO_AMOUNT_INTENTS else amount}
 
     return {"intent": "UNKNOWN", "amount": amount}
-
@@ -1,14 +1,20 @@
+from types import MappingProxyType
+
+# Allocations are shared and read-only; copy with dict() before changing them
+HIGH_STABILITY_ALLOCATION = MappingProxyType({
+    "equity": "60%",
+    "debt": "30%",
+    "emergency_fund": "10%"
+})
+
+LOW_STABILITY_ALLOCATION = MappingProxyType({
+    "equity": "40%",
+    "debt": "40%",
+    "emergency_fund": "20%"
+})
+
 def investment_allocation(stability_score):
     if stability_score >= 70:
-        return {
-            "equity": "60%",
-            "debt": "30%",
-            "emergency_fund": "10%"
-        }
-
-    return {
-        "equity": "40%",
-        "debt": "40%",
-        "emergency_fund": "20%"
-    }
+        return HIGH_STABILITY_ALLOCATION
 
+    return LOW_STABILITY_ALLOCATION
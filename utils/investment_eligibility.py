@@ -1,21 +1,34 @@
+from types import MappingProxyType
+
+# Possible outcomes, built once and returned read-only
+IRREGULAR_INCOME_RESULT = MappingProxyType({
+    "eligible": False,
+    "reason": "Income too irregular for investments"
+})
+
+UNCERTAIN_INCOME_RESULT = MappingProxyType({
+    "eligible": False,
+    "reason": "High income uncertainty detected"
+})
+
+ELIGIBLE_LOW_RISK_RESULT = MappingProxyType({
+    "eligible": True,
+    "risk_level": "LOW"
+})
+
+ELIGIBLE_MEDIUM_RISK_RESULT = MappingProxyType({
+    "eligible": True,
+    "risk_level": "MEDIUM"
+})
+
 def check_investment_eligibility(stability_score, prediction):
     if stability_score < 40:
-        return {
-            "eligible": False,
-            "reason": "Income too irregular for investments"
-        }
+        return IRREGULAR_INCOME_RESULT
 
     if prediction["worst_case_income"] < prediction["expected_income"] * 0.6:
-        return {
-            "eligible": False,
-            "reason": "High income uncertainty detected"
-        }
-
-    return {
-        "eligible": True,
-        "risk_level": (
-            "LOW" if stability_score >= 70
-            else "MEDIUM"
-        )
-    }
+        return UNCERTAIN_INCOME_RESULT
+
+    if stability_score >= 70:
+        return ELIGIBLE_LOW_RISK_RESULT
 
+    return ELIGIBLE_MEDIUM_RISK_RESULT
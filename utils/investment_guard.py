@@ -1,11 +1,17 @@
+from types import MappingProxyType
+
+# Shared read-only results
+PAUSE_RESULT = MappingProxyType({
+    "pause": True,
+    "reason": "Income dropped below safe investment threshold"
+})
+
+CONTINUE_RESULT = MappingProxyType({
+    "pause": False
+})
+
 def should_pause_investment(prediction, current_sip):
     if prediction["worst_case_income"] < (current_sip * 4):
-        return {
-            "pause": True,
-            "reason": "Income dropped below safe investment threshold"
-        }
-
-    return {
-        "pause": False
-    }
+        return PAUSE_RESULT
 
+    return CONTINUE_RESULT
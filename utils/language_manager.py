@@ -1,22 +1,74 @@
 import csv
+import os
+import threading
 from pathlib import Path
 
 USER_FILE = Path("data/users.csv")
 
+# Read-ahead buffer for users.csv (default is 8 KiB)
+READ_BUFFER_SIZE = 1 << 20
+
+DEFAULT_LANGUAGE = ("en", False)
+
+# Latest (language, voice_enabled) per user, reloaded only when the file changes
+_lang_cache = {}
+_lang_cache_key = None
+_lang_lock = threading.Lock()
+
+def _file_key():
+    stat = os.stat(USER_FILE)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _parse_bool(value):
+    return str(value).strip().lower() in ("true", "1", "yes")
+
+
+def _load_languages():
+    """Returns the cached settings, re-reading users.csv if it changed on disk"""
+    global _lang_cache, _lang_cache_key
+
+    try:
+        key = _file_key()
+    except FileNotFoundError:
+        _lang_cache, _lang_cache_key = {}, None
+        return _lang_cache
+
+    if key == _lang_cache_key:
+        return _lang_cache
+
+    settings = {}
+    with open(USER_FILE, mode="r", buffering=READ_BUFFER_SIZE, newline="") as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header:
+            uid_i = header.index("user_id")
+            lang_i = header.index("language")
+            voice_i = header.index("voice_enabled")
+
+            # Rows are appended, so later rows override earlier ones
+            for row in reader:
+                if row:
+                    settings[row[uid_i]] = (row[lang_i], _parse_bool(row[voice_i]))
+
+    _lang_cache, _lang_cache_key = settings, key
+    return _lang_cache
+
+
 def set_user_language(user_id, language, voice_enabled=False):
-    with open(USER_FILE, mode="a", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow([user_id, language, voice_enabled])
+    global _lang_cache_key
 
-def get_user_language(user_id):
-    if not USER_FILE.exists():
-        return "en", False
+    with _lang_lock:
+        settings = _load_languages()
 
-    with open(USER_FILE, mode="r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            if row["user_id"] == user_id:
-                return row["language"], row["voice_enabled"]
+        with open(USER_FILE, mode="a", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow([user_id, language, voice_enabled])
 
-    return "en", False
+        # Our own append: update the cache in place instead of re-reading
+        settings[user_id] = (language, _parse_bool(voice_enabled))
+        _lang_cache_key = _file_key()
 
+def get_user_language(user_id):
+    with _lang_lock:
+        return _load_languages().get(user_id, DEFAULT_LANGUAGE)
@@ -1,3 +1,10 @@
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
 def calculate_safe_emi(monthly_income: float) -> float:
     """
     EMI should not exceed 30% of income
@@ -10,10 +17,27 @@ def loan_amount_from_emi(emi: float, months: int = 24, interest_rate: float = 0.
     Rough loan amount estimation from EMI
     """
     r = interest_rate / 12
-    loan_amount = emi * ((1 + r) ** months - 1) / (r * (1 + r) ** months)
+    growth = (1 + r) ** months
+    loan_amount = emi * (growth - 1) / (r * growth)
     return round(loan_amount, 2)
 
 
+def loan_amount_from_emi_batch(emis, months: int = 24, interest_rate: float = 0.14):
+    """
+    loan_amount_from_emi for many EMIs at once
+    (one numpy pass when numpy is installed)
+    """
+    if not NUMPY_AVAILABLE:
+        return [loan_amount_from_emi(emi, months, interest_rate) for emi in emis]
+
+    r = interest_rate / 12
+    growth = (1 + r) ** months
+    factor = (growth - 1) / (r * growth)
+
+    emis = np.asarray(emis, dtype=float)
+    return np.round(emis * factor, 2).tolist()
+
+
 def loan_decision(stability_score: float):
     """
     Decide loan category based on stability
@@ -1,12 +1,44 @@
+import atexit
 import csv
+import threading
 from pathlib import Path
 
+from utils.daily_income_store import PARQUET_AVAILABLE, add_income, income_store_lock
+
 FILE_PATH = Path("data/transactions.csv")
 
+# Write buffer for the long-lived transactions.csv handle
+WRITE_BUFFER_SIZE = 1 << 18
+
+# Buffered rows reach the file after this many rows or this many seconds
+FLUSH_EVERY_ROWS = 32
+FLUSH_DELAY = 1.0
+
+_file = None
+_writer = None
+_pending_rows = 0
+_flush_timer = None
+_write_lock = threading.Lock()
+
 def save_transaction(txn: dict, user_id: str):
-    with open(FILE_PATH, mode="a", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow([
+    if txn["category"] == "INCOME" and PARQUET_AVAILABLE:
+        # Keep the per-user daily income file in step with the csv
+        with income_store_lock:
+            _append_row(txn, user_id)
+            add_income(user_id, txn["timestamp"], txn["amount"])
+    else:
+        _append_row(txn, user_id)
+
+
+def _append_row(txn: dict, user_id: str):
+    global _file, _writer, _pending_rows, _flush_timer
+
+    with _write_lock:
+        if _writer is None:
+            _file = open(FILE_PATH, mode="a", newline="", buffering=WRITE_BUFFER_SIZE)
+            _writer = csv.writer(_file)
+
+        _writer.writerow([
             txn["amount"],
             txn["type"],
             txn["category"],
@@ -14,4 +46,32 @@ def save_transaction(txn: dict, user_id: str):
             txn["timestamp"],
             user_id
         ])
+        _pending_rows += 1
+
+        if _pending_rows >= FLUSH_EVERY_ROWS:
+            _flush_locked()
+        elif _flush_timer is None:
+            _flush_timer = threading.Timer(FLUSH_DELAY, flush_transactions)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+
+def _flush_locked():
+    global _pending_rows, _flush_timer
+
+    if _flush_timer is not None:
+        _flush_timer.cancel()
+        _flush_timer = None
+
+    if _file is not None and _pending_rows:
+        _file.flush()
+    _pending_rows = 0
+
+
+def flush_transactions():
+    """Write any buffered transactions to disk"""
+    with _write_lock:
+        _flush_locked()
+
 
+atexit.register(flush_transactions)
@@ -1,35 +1,43 @@
+import re
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+# Keywords for income (single words, and two-word phrases)
+INCOME_KEYWORDS = frozenset({
+    "salary", "credited", "received", "payout", "settlement", "reward"
+})
+INCOME_PHRASES = frozenset({("payment", "from")})
+
+# Keywords for transfers (single words, and two-word phrases)
+TRANSFER_KEYWORDS = frozenset({"self", "withdrawal"})
+TRANSFER_PHRASES = frozenset({("own", "account"), ("to", "bank")})
+
+
+def _has_keyword(tokens, keywords, phrases):
+    if not keywords.isdisjoint(tokens):
+        return True
+    return not phrases.isdisjoint(zip(tokens, tokens[1:]))
+
+
 def classify_transaction(transaction: dict, original_message: str):
     """
     Classifies transaction into INCOME / EXPENSE / TRANSFER
     """
 
-    msg = original_message.lower()
     txn_type = transaction["type"]
 
-    # Keywords for income
-    income_keywords = [
-        "salary", "credited", "received", "payment from",
-        "payout", "settlement", "reward"
-    ]
-
-    # Keywords for transfers
-    transfer_keywords = [
-        "self", "own account", "to bank", "withdrawal"
-    ]
-
     # CREDIT logic
     if txn_type == "credit":
-        for word in income_keywords:
-            if word in msg:
-                return "INCOME"
+        tokens = _WORD_RE.findall(original_message.lower())
+        if _has_keyword(tokens, INCOME_KEYWORDS, INCOME_PHRASES):
+            return "INCOME"
         return "INCOME"  # default credit → income
 
     # DEBIT logic
     if txn_type == "debit":
-        for word in transfer_keywords:
-            if word in msg:
-                return "TRANSFER"
+        tokens = _WORD_RE.findall(original_message.lower())
+        if _has_keyword(tokens, TRANSFER_KEYWORDS, TRANSFER_PHRASES):
+            return "TRANSFER"
         return "EXPENSE"
 
     return "UNKNOWN"
-
@@ -1,6 +1,17 @@
 import re
 from datetime import datetime
 
+# Amount, type and source markers in one zero-width pattern, so a single
+# finditer pass reports every marker (overlapping ones included)
+_TXN_RE = re.compile(
+    r"(?=(?:rs\.?|₹)\s?(?P<amount>[\d,]+)"
+    r"|(?P<debit>debit|spent)"
+    r"|(?P<credit>credit|received)"
+    r"|(?P<upi>upi)"
+    r"|(?P<card>card))"
+)
+_STRIP_COMMAS = str.maketrans("", "", ",")
+
 def parse_transaction_message(message: str):
     """
     Takes bank SMS / UPI message text
@@ -9,25 +20,34 @@ def parse_transaction_message(message: str):
 
     message_lower = message.lower()
 
+    amount_text = None
+    found = set()
+    for match in _TXN_RE.finditer(message_lower):
+        group = match.lastgroup
+        if group == "amount":
+            if amount_text is None:
+                amount_text = match.group("amount")
+        else:
+            found.add(group)
+
     # 1️⃣ Detect amount
-    amount_match = re.search(r"(rs\.?|₹)\s?([\d,]+)", message_lower)
-    if not amount_match:
+    if amount_text is None:
         return None  # Not a transaction
 
-    amount = int(amount_match.group(2).replace(",", ""))
+    amount = int(amount_text.translate(_STRIP_COMMAS))
 
     # 2️⃣ Detect transaction type
-    if "debit" in message_lower or "spent" in message_lower:
+    if "debit" in found:
         txn_type = "debit"
-    elif "credit" in message_lower or "received" in message_lower:
+    elif "credit" in found:
         txn_type = "credit"
     else:
         txn_type = "unknown"
 
     # 3️⃣ Detect source
-    if "upi" in message_lower:
+    if "upi" in found:
         source = "UPI"
-    elif "card" in message_lower:
+    elif "card" in found:
         source = "CARD"
     else:
         source = "BANK"
@@ -1,3 +1,5 @@
+import re
+
 TRANSLATIONS = {
     "hi": {
         "Suspicious Transaction Blocked": "संदिग्ध लेनदेन रोका गया",
@@ -13,13 +15,22 @@ TRANSLATIONS = {
     }
 }
 
+# One alternation per language (longest phrase first), so a single
+# pass over the text replaces every known phrase
+_PATTERNS = {
+    language: re.compile("|".join(
+        re.escape(eng) for eng in sorted(mapping, key=len, reverse=True)
+    ))
+    for language, mapping in TRANSLATIONS.items()
+}
+
 def translate_text(text, language="en"):
     if language == "en":
         return text
 
-    translated = text
-    for eng, local in TRANSLATIONS.get(language, {}).items():
-        translated = translated.replace(eng, local)
-
-    return translated
+    pattern = _PATTERNS.get(language)
+    if pattern is None:
+        return text
 
+    mapping = TRANSLATIONS[language]
+    return pattern.sub(lambda m: mapping[m.group(0)], text)
@@ -2,16 +2,48 @@
 Twilio Client
 Uses environment variables for credentials
 """
-from twilio.rest import Client
 import os
+import threading
 
 # Load from environment variables
 ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID", "")
 AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN", "")
 WHATSAPP_FROM = os.getenv("TWILIO_WHATSAPP_NUMBER", "whatsapp:+14155238886")
 
-# Only create client if credentials exist
-client = None
-if ACCOUNT_SID and AUTH_TOKEN:
-    client = Client(ACCOUNT_SID, AUTH_TOKEN)
+# Connection pool of the shared client, so concurrent sends reuse TLS connections
+TWILIO_POOL_CONNECTIONS = 10
+TWILIO_POOL_MAXSIZE = 50
+# Retries only cover failed connects for POSTs, so a message is never sent twice
+TWILIO_MAX_RETRIES = 2
 
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Shared Twilio client, created on first use (None without credentials)"""
+    global _client
+
+    # Only create client if credentials exist
+    if _client is None and ACCOUNT_SID and AUTH_TOKEN:
+        with _client_lock:
+            if _client is None:
+                from requests.adapters import HTTPAdapter
+                from twilio.http.http_client import TwilioHttpClient
+                from twilio.rest import Client
+
+                http_client = TwilioHttpClient()
+                http_client.session.mount("https://", HTTPAdapter(
+                    pool_connections=TWILIO_POOL_CONNECTIONS,
+                    pool_maxsize=TWILIO_POOL_MAXSIZE,
+                    max_retries=TWILIO_MAX_RETRIES
+                ))
+                _client = Client(ACCOUNT_SID, AUTH_TOKEN, http_client=http_client)
+
+    return _client
+
+
+def __getattr__(name):
+    # Keeps `from utils.twilio_client import client` working
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
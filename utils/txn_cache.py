@@ -0,0 +1,47 @@
+import csv
+import os
+from collections import defaultdict
+from datetime import datetime
+
+from utils.storage import flush_transactions
+
+TRANSACTION_FILE = "data/transactions.csv"
+
+# Raw rows grouped by user, reloaded only when the file changes; each user's
+# rows are parsed the first time that user is asked for
+_cache = {"key": None, "raw_by_user": {}, "parsed_by_user": {}}
+
+
+def get_user_transactions(user_id):
+    """
+    Returns the user's rows from transactions.csv,
+    with amount as float and timestamp as datetime
+    """
+    global _cache
+
+    # Rows saved moments ago may still sit in the writer's buffer
+    flush_transactions()
+
+    stat = os.stat(TRANSACTION_FILE)
+    key = (stat.st_mtime_ns, stat.st_size)
+
+    cache = _cache
+    if cache["key"] != key:
+        raw_by_user = defaultdict(list)
+        with open(TRANSACTION_FILE, mode="r") as file:
+            reader = csv.DictReader(file)
+            for row in reader:
+                raw_by_user[row["user_id"]].append(row)
+
+        # Swapped in whole so concurrent callers never see a half-built cache
+        cache = _cache = {"key": key, "raw_by_user": dict(raw_by_user), "parsed_by_user": {}}
+
+    rows = cache["parsed_by_user"].get(user_id)
+    if rows is None:
+        rows = [
+            {**row, "amount": float(row["amount"]), "timestamp": datetime.fromisoformat(row["timestamp"])}
+            for row in cache["raw_by_user"].get(user_id, ())
+        ]
+        cache["parsed_by_user"][user_id] = rows
+
+    return rows
@@ -1,9 +1,32 @@
-from utils.twilio_client import client, WHATSAPP_FROM
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.twilio_client import get_client, WHATSAPP_FROM
+
+# Concurrent sends for bursts, sharing the Twilio client's connection pool
+SEND_WORKERS = 16
+
+_send_executor = ThreadPoolExecutor(max_workers=SEND_WORKERS, thread_name_prefix="wa-send")
 
 def send_whatsapp_message(to_number, message):
-    client.messages.create(
+    get_client().messages.create(
         from_=WHATSAPP_FROM,
         body=message,
         to=f"whatsapp:{to_number}"
     )
 
+
+def send_whatsapp_messages(messages):
+    """
+    Sends many (to_number, message) pairs concurrently.
+    Returns a list of (to_number, error) with error None on success
+    """
+    futures = [
+        (to_number, _send_executor.submit(send_whatsapp_message, to_number, message))
+        for to_number, message in messages
+    ]
+
+    results = []
+    for to_number, future in futures:
+        error = future.exception()
+        results.append((to_number, str(error) if error else None))
+    return results
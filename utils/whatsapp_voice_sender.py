@@ -1,7 +1,7 @@
-from utils.twilio_client import client, WHATSAPP_FROM
+from utils.twilio_client import get_client, WHATSAPP_FROM
 
 def send_whatsapp_voice(to_number, audio_url):
-    client.messages.create(
+    get_client().messages.create(
         from_=WHATSAPP_FROM,
         to=f"whatsapp:{to_number}",
         media_url=[audio_url]